@@ -0,0 +1,67 @@
+"""Benchmark of firefly.codec against the standard library json module.
+
+The payload resembles a browser response: a list of asset metadata.
+
+Run from the repository root:
+
+    poetry run python -m benchmarks.codec
+"""
+
+import json
+import timeit
+
+from firefly import codec
+
+COUNT = 1000
+REPEAT = 5
+NUMBER = 20
+
+
+def make_payload(count):
+    return {
+        "response": 200,
+        "message": "OK",
+        "data": [
+            {
+                "id": i,
+                "id_folder": i % 10 + 1,
+                "title": f"Asset {i}",
+                "subtitle": "Episode subtitle",
+                "description": "Lorem ipsum dolor sit amet " * 4,
+                "status": 1,
+                "content_type": 2,
+                "media_type": 1,
+                "duration": 1234.56 + i,
+                "ctime": 1_700_000_000 + i,
+                "mtime": 1_700_000_000 + i,
+                "genre": "urn:tva:metadata:cs:ContentCS:2002:3.1.1",
+                "path": f"media.dir/{i:06d}.mxf",
+            }
+            for i in range(count)
+        ],
+    }
+
+
+def measure(func):
+    """Return the best time of a single call in milliseconds."""
+    return min(timeit.repeat(func, repeat=REPEAT, number=NUMBER)) / NUMBER * 1000
+
+
+def main():
+    payload = make_payload(COUNT)
+    encoded = codec.encode(payload)
+    assert json.loads(encoded) == codec.decode(json.dumps(payload).encode())
+
+    print(f"{COUNT} assets, {len(encoded)} bytes, codec: {codec.CODEC}")
+    results = [
+        ("encode", "json", measure(lambda: json.dumps(payload).encode("utf-8"))),
+        ("encode", codec.CODEC, measure(lambda: codec.encode(payload))),
+        ("decode", "json", measure(lambda: json.loads(encoded))),
+        ("decode", codec.CODEC, measure(lambda: codec.decode(encoded))),
+    ]
+    for operation, name, ms in results:
+        print(f"{operation} {name:<8} {ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark of rendering browser cells through FireflyViewModel.data().
+
+A page of assets with a typical browser header is rendered for the
+Display, Foreground and ToolTip roles, as the view does when it is
+painted and hovered. The cold pass runs on a new model, so the column
+formatters are compiled and the render cache is filled. The warm pass
+repeats it on the same model. The ToolTip role is not cached.
+
+Run from the repository root:
+
+    poetry run python -m benchmarks.formatter
+"""
+
+import os
+import time
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+from firefly.objects import Asset
+from firefly.view import FireflyViewModel
+
+ROWS = 1000
+REPEAT = 5
+
+COLUMNS = [
+    "title",
+    "subtitle",
+    "id/main",
+    "duration",
+    "status",
+    "qc/state",
+    "content_type",
+    "media_type",
+    "id_folder",
+    "ctime",
+    "mtime",
+    "promoted",
+]
+
+ROLES = {
+    "Display": Qt.ItemDataRole.DisplayRole,
+    "Foreground": Qt.ItemDataRole.ForegroundRole,
+    "ToolTip": Qt.ItemDataRole.ToolTipRole,
+}
+
+
+def make_model(rows):
+    model = FireflyViewModel(None)
+    model.header_data = COLUMNS
+    model.object_data = [
+        Asset.from_trusted(
+            {
+                "id": i,
+                "id_folder": i % 10 + 1,
+                "title": f"Asset {i}",
+                "subtitle": "Episode subtitle",
+                "id/main": f"A{i:06d}",
+                "duration": 1234.56 + i,
+                "status": 1,
+                "qc/state": 4,
+                "content_type": 2,
+                "media_type": 1,
+                "ctime": 1_700_000_000 + i,
+                "mtime": 1_700_000_000 + i,
+                "promoted": i % 2,
+            }
+        )
+        for i in range(rows)
+    ]
+    return model
+
+
+def render(model, role):
+    """Return the time needed to render all cells in milliseconds."""
+    start = time.perf_counter()
+    for row in range(model.rowCount(None)):
+        for column in range(model.columnCount(None)):
+            model.data(model.index(row, column), role)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    app = QApplication.instance() or QApplication([])
+    assert app
+
+    print(f"{ROWS} rows, {len(COLUMNS)} columns")
+    for name, role in ROLES.items():
+        cold = []
+        warm = []
+        for _ in range(REPEAT):
+            model = make_model(ROWS)
+            cold.append(render(model, role))
+            warm.append(render(model, role))
+        print(f"{name:<10} cold {min(cold):8.3f} ms  warm {min(warm):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark of the memory used by asset objects.
+
+Compares the object layout before __slots__ (instance __dict__, class
+defaults copied to each meta, keys not interned) with the current one,
+with and without interned keys.
+
+Each meta is decoded from its own JSON document, as the assets of the
+persistent asset store are, so the decoded metas do not share key strings.
+
+Run from the repository root:
+
+    poetry run python -m benchmarks.objects
+"""
+
+import gc
+import json
+import tracemalloc
+
+from firefly.objects import Asset
+
+COUNT = 10000
+
+
+class DictAsset:
+    """Asset layout before __slots__ were used."""
+
+    def __init__(self, meta):
+        self.text_changed = self.meta_changed = False
+        self.is_new = True
+        self.meta = {}
+        for key in meta:
+            self.meta[key] = meta[key]
+        for key in Asset.defaults:
+            if key not in self.meta:
+                self.meta[key] = Asset.defaults[key]
+
+
+class SlotsAsset:
+    """Current asset layout without interned keys."""
+
+    __slots__ = ("meta", "text_changed", "meta_changed", "is_new")
+
+    def __init__(self, meta):
+        self.text_changed = self.meta_changed = False
+        self.is_new = True
+        self.meta = dict(meta)
+
+
+def make_blobs(count):
+    return [
+        json.dumps(
+            {
+                "id": i,
+                "id_folder": i % 10 + 1,
+                "title": f"Asset {i}",
+                "subtitle": "Episode subtitle",
+                "status": 1,
+                "duration": 1234.56 + i,
+                "ctime": 1_700_000_000 + i,
+                "mtime": 1_700_000_000 + i,
+                "path": f"media.dir/{i:06d}.mxf",
+                "video/fps": "25/1",
+                "audio/tracks": 2,
+            }
+        )
+        for i in range(count)
+    ]
+
+
+def retained(factory, blobs):
+    """Return the memory kept by the created objects in bytes per object."""
+    gc.collect()
+    tracemalloc.start()
+    objects = [factory(json.loads(blob)) for blob in blobs]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(objects) == len(blobs)
+    return size / len(objects)
+
+
+def main():
+    blobs = make_blobs(COUNT)
+    print(f"{COUNT} assets")
+    for name, factory in [
+        ("__dict__, copied defaults", DictAsset),
+        ("__slots__", SlotsAsset),
+        ("__slots__, interned keys", lambda meta: Asset(meta=meta)),
+        ("from_trusted", Asset.from_trusted),
+    ]:
+        print(f"{name:<26} {retained(factory, blobs):8.0f} B/asset")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark of the rundown timing engine against rebuilding the rundown.
+
+Recomputing the times to preview a change (as RundownModel.recompute_times
+does) is compared with the client side part of a full reload, which builds
+the rundown objects from the rows again (as RundownModel.set_days does).
+Both use the functions of the rundown model. The server round trip of the
+reload is not included.
+
+Run from the repository root:
+
+    poetry run python -m benchmarks.rundown_timing
+"""
+
+import random
+import timeit
+
+from firefly.enum import RunMode
+from firefly.modules.rundown.model import day_objects, rundown_timing
+
+DAYS = 3
+EVENTS_PER_DAY = 24
+REPEAT = 5
+NUMBER = 10
+
+EVENT_RUN_MODES = [RunMode.RUN_AUTO, RunMode.RUN_AUTO, RunMode.RUN_SOFT]
+ITEM_RUN_MODES = [RunMode.RUN_AUTO, RunMode.RUN_AUTO, RunMode.RUN_SKIP]
+
+
+def make_rows(days, events_per_day):
+    """Return rundown rows as received from the server."""
+    rng = random.Random(0)
+    rows = []
+    ts = 1_700_000_000
+    for id_event in range(1, days * events_per_day + 1):
+        rows.append(
+            {
+                "type": "event",
+                "id": id_event,
+                "id_bin": id_event,
+                "title": f"Event {id_event}",
+                "run_mode": rng.choice(EVENT_RUN_MODES),
+                "scheduled_time": ts,
+                "broadcast_time": ts,
+                "is_empty": False,
+                "meta": {},
+            }
+        )
+        for position in range(rng.randint(2, 8)):
+            rows.append(
+                {
+                    "type": "item",
+                    "id": len(rows),
+                    "id_bin": id_event,
+                    "position": position,
+                    "title": f"Item {len(rows)}",
+                    "run_mode": rng.choice(ITEM_RUN_MODES),
+                    "duration": rng.uniform(30, 900),
+                    "mark_in": 0,
+                    "mark_out": 0,
+                    "scheduled_time": ts,
+                    "broadcast_time": ts,
+                    "meta": {},
+                }
+            )
+        ts += 3600
+    return rows
+
+
+def rebuild(rows):
+    """Build the rundown objects from the rows."""
+    objects, _ = day_objects(rows, 1)
+    return objects
+
+
+def recompute(object_data):
+    """Recompute the times of the rundown objects."""
+    return rundown_timing(object_data).compute()
+
+
+def measure(func):
+    """Return the best time of a single call in milliseconds."""
+    return min(timeit.repeat(func, repeat=REPEAT, number=NUMBER)) / NUMBER * 1000
+
+
+def main():
+    rows = make_rows(DAYS, EVENTS_PER_DAY)
+    object_data = rebuild(rows)
+
+    print(f"{DAYS} days, {len(rows)} rows")
+    print(f"rebuild   {measure(lambda: rebuild(rows)):8.3f} ms")
+    print(f"recompute {measure(lambda: recompute(object_data)):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
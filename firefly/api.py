@@ -1,16 +1,37 @@
+import asyncio
 import functools
+import gzip
 import json
-import time
+from typing import Any, Callable
 
-from PySide6.QtCore import QUrl
-from PySide6.QtNetwork import QNetworkAccessManager, QNetworkRequest
-from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEventLoop, QTimer, QUrl
+from PySide6.QtNetwork import QNetworkAccessManager, QNetworkReply, QNetworkRequest
 
 import firefly
+from firefly import codec
 from firefly.config import config
 from firefly.log import log
 from firefly.objects import asset_cache
 
+# Default transfer timeout (seconds) used when a call does not specify one.
+# Note that some endpoints (playout) accept their own `timeout` argument,
+# so the client-side timeout is passed as `request_timeout`.
+REQUEST_TIMEOUT = 30
+
+# Endpoints accepting a list of object ids and returning the requested
+# objects. Asynchronous calls to these endpoints made within BATCH_WINDOW (ms)
+# are coalesced into a single request and each caller receives its objects.
+BATCH_ENDPOINTS = {"get": "ids"}
+BATCH_WINDOW = 15
+
+# Read-only endpoints. Identical asynchronous requests to these endpoints
+# share a single in-flight request.
+DEDUPE_ENDPOINTS = ["get", "browse", "rundown", "actions"]
+
+# Request bodies larger than this (bytes) are gzipped when the site
+# has `compress_requests` enabled.
+COMPRESS_THRESHOLD = 16 * 1024
+
 
 class NebulaResponse:
     def __init__(self, response=200, message=None, **kwargs):
@@ -22,7 +43,7 @@ class NebulaResponse:
 
     @property
     def json(self):
-        return json.dumps(self.dict)
+        return codec.encode(self.dict).decode("utf-8")
 
     @property
     def response(self):
@@ -54,20 +75,177 @@ class NebulaResponse:
         return self.is_success
 
 
+class RequestBatch:
+    """Asynchronous calls to a batch endpoint waiting to be sent."""
+
+    def __init__(self, endpoint: str, list_key: str, request_timeout, kwargs):
+        self.endpoint = endpoint
+        self.list_key = list_key
+        self.request_timeout = request_timeout
+        self.kwargs = kwargs
+        self.items: list[Any] = []
+        self.requests: list[tuple[Callable, list[Any]]] = []
+
+    def add(self, callback, items: list) -> None:
+        self.requests.append((callback, items))
+        for item in items:
+            if item not in self.items:
+                self.items.append(item)
+
+    def split(self, response: NebulaResponse, items: list) -> NebulaResponse:
+        """Return the part of the response requested by a single caller."""
+        if response.is_error:
+            return response
+        ids = set(items)
+        data = [meta for meta in response.data if meta.get("id") in ids]
+        return NebulaResponse(**{**response.dict, "data": data})
+
+    def on_response(self, response: NebulaResponse) -> None:
+        for callback, items in self.requests:
+            callback(self.split(response, items))
+
+
+class ConnectionStats:
+    """Network usage counters of the API client."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.aborted = 0
+        self.http2 = 0
+        self.encrypted = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def __repr__(self):
+        return (
+            f"<ConnectionStats requests={self.requests} errors={self.errors}"
+            f" aborted={self.aborted}"
+            f" http2={self.http2} encrypted={self.encrypted}"
+            f" sent={self.bytes_sent} received={self.bytes_received}>"
+        )
+
+
 class NebulaAPI:
     def __init__(self):
         self.manager = None
         self.queries = []
-
-    def run(self, endpoint: str, callback, **kwargs):
+        self._batches = {}
+        self._in_flight = {}
+        self._replies = {}
+        self.stats = ConnectionStats()
+
+    def _get_manager(self) -> QNetworkAccessManager:
+        """Return the network access manager shared by all requests.
+
+        Using a single manager keeps connections to the server alive
+        between requests, so TLS handshakes are not repeated. The manager
+        also advertises the compression methods it supports (gzip, deflate,
+        and brotli/zstd when Qt is built with them) and decompresses
+        responses transparently. Accept-Encoding must not be set manually,
+        as that disables the transparent decompression.
+        """
         if self.manager is None:
             self.manager = QNetworkAccessManager()
+        return self.manager
+
+    def run(self, endpoint: str, callback, request_timeout=None, **kwargs):
+        """Execute an API request.
+
+        When `callback` is a callable, the request is asynchronous and the
+        callback receives the NebulaResponse once the reply is finished.
+        Such requests may be coalesced with other calls (see BATCH_ENDPOINTS
+        and DEDUPE_ENDPOINTS).
+
+        When `callback` is -1, the call blocks (without busy-waiting) until
+        the reply is finished and the response is returned.
+        """
+        if callable(callback) and endpoint in BATCH_ENDPOINTS:
+            list_key = BATCH_ENDPOINTS[endpoint]
+            if isinstance(kwargs.get(list_key), list):
+                self._enqueue(endpoint, callback, request_timeout, **kwargs)
+                return
+        return self._dispatch(endpoint, callback, request_timeout, **kwargs)
+
+    def _enqueue(self, endpoint: str, callback, request_timeout, **kwargs):
+        list_key = BATCH_ENDPOINTS[endpoint]
+        items = kwargs.pop(list_key)
+        key = (endpoint, request_timeout, json.dumps(kwargs, sort_keys=True))
+        if (batch := self._batches.get(key)) is None:
+            batch = RequestBatch(endpoint, list_key, request_timeout, kwargs)
+            self._batches[key] = batch
+            QTimer.singleShot(BATCH_WINDOW, functools.partial(self._flush, key))
+        batch.add(callback, items)
+
+    def _flush(self, key):
+        batch = self._batches.pop(key)
+        if len(batch.requests) > 1:
+            log.debug(f"Coalesced {len(batch.requests)} {batch.endpoint} requests")
+        self._dispatch(
+            batch.endpoint,
+            batch.on_response,
+            batch.request_timeout,
+            **{batch.list_key: batch.items},
+            **batch.kwargs,
+        )
+
+    def _dispatch(self, endpoint: str, callback, request_timeout=None, **kwargs):
+        if callable(callback) and endpoint in DEDUPE_ENDPOINTS:
+            signature = f"{endpoint}:{json.dumps(kwargs, sort_keys=True)}"
+            if signature in self._in_flight:
+                log.debug(f"Joining identical in-flight {endpoint} request")
+                self._in_flight[signature].append(callback)
+                return
+            callbacks = self._in_flight[signature] = [callback]
+            reply = self._send(
+                endpoint,
+                functools.partial(self._fan_out, signature, callbacks),
+                request_timeout,
+                **kwargs,
+            )
+            if self._in_flight.get(signature) is callbacks and reply is not None:
+                self._replies[signature] = reply
+            return
+        return self._send(endpoint, callback, request_timeout, **kwargs)
+
+    def _fan_out(self, signature: str, callbacks: list, response: NebulaResponse):
+        if self._in_flight.get(signature) is callbacks:
+            del self._in_flight[signature]
+            self._replies.pop(signature, None)
+        for callback in callbacks:
+            callback(response)
+
+    def cancel(self, callback) -> None:
+        """Cancel an asynchronous request made with the given callback.
+
+        The callback will not be called. The network request is aborted
+        unless it is shared with other callers. Only requests to
+        DEDUPE_ENDPOINTS can be cancelled.
+
+        Like run, this is a method of the client, not an API endpoint.
+        """
+        for signature, callbacks in self._in_flight.items():
+            if callback not in callbacks:
+                continue
+            callbacks.remove(callback)
+            if not callbacks:
+                del self._in_flight[signature]
+                if reply := self._replies.pop(signature, None):
+                    reply.setProperty("aborted", True)
+                    reply.abort()
+            return
+
+    def _send(self, endpoint: str, callback, request_timeout=None, **kwargs):
+        manager = self._get_manager()
+
+        is_sync = " sync" if callback == -1 else ""
+        log.debug(f"Executing {endpoint} request{is_sync}")
 
-        is_async = " async" if callback == -1 else ""
-        log.debug(f"Executing {endpoint} request{is_async}")
+        if request_timeout is None:
+            request_timeout = REQUEST_TIMEOUT
 
         endpoint = "/api/" + endpoint
-        data = json.dumps(kwargs).encode("ascii")
+        data = codec.encode(kwargs)
         access_token = config.site.token
         authorization = bytes(f"Bearer {access_token}", "ascii")
         user_agent = bytes(f"firefly/{firefly.__version__}", "ascii")
@@ -77,9 +255,17 @@ class NebulaAPI:
         request.setRawHeader(b"User-Agent", user_agent)
         request.setRawHeader(b"Authorization", authorization)
         request.setRawHeader(b"X-Client-Id", bytes(config.client_id, "ascii"))
+        request.setAttribute(QNetworkRequest.Attribute.Http2AllowedAttribute, True)
+        if request_timeout:
+            request.setTransferTimeout(int(request_timeout * 1000))
+        compress = config.site and config.site.compress_requests
+        if compress and len(data) > COMPRESS_THRESHOLD:
+            data = gzip.compress(data)
+            request.setRawHeader(b"Content-Encoding", b"gzip")
+        self.stats.bytes_sent += len(data)
 
         try:
-            query = self.manager.post(request, data)
+            query = manager.post(request, data)
             if callback != -1:
                 query.finished.connect(functools.partial(self.handler, query, callback))
             self.queries.append(query)
@@ -94,35 +280,82 @@ class NebulaAPI:
             return
 
         if callback == -1:
-            while not query.isFinished():
-                time.sleep(0.0001)
-                QApplication.processEvents()
-            return self.handler(query, -1)
+            return self._wait(query)
+        return query
+
+    def _wait(self, query):
+        """Block until the reply is finished and return the response.
+
+        A local event loop is used instead of polling, so the thread
+        sleeps while waiting. User input is not processed meanwhile,
+        so UI actions cannot re-enter the caller during the request.
+        """
+        if not query.isFinished():
+            loop = QEventLoop()
+            query.finished.connect(loop.quit)
+            loop.exec(QEventLoop.ProcessEventsFlag.ExcludeUserInputEvents)
+        return self.handler(query, -1)
+
+    def run_async(self, endpoint: str, **kwargs) -> asyncio.Future:
+        """Execute an API request and return an awaitable future.
+
+        This requires an asyncio event loop integrated with the Qt event
+        loop (e.g. qasync), since the reply is delivered by Qt.
+        """
+        future = asyncio.get_event_loop().create_future()
+
+        def callback(response):
+            if not future.done():
+                future.set_result(response)
+
+        self.run(endpoint, callback, **kwargs)
+        return future
 
     def handler(self, response, callback):
         status = response.attribute(QNetworkRequest.HttpStatusCodeAttribute)
-        bytes_string = response.readAll()
-        data = str(bytes_string, "utf-8")
+        data = response.readAll()
+
+        self.stats.requests += 1
+        self.stats.bytes_received += len(data)
+        if response.attribute(QNetworkRequest.Attribute.Http2WasUsedAttribute):
+            self.stats.http2 += 1
+        if response.attribute(QNetworkRequest.Attribute.ConnectionEncryptedAttribute):
+            self.stats.encrypted += 1
 
         request = response.request()
         url = request.url().toString()
 
+        payload = {}
+        message = ""
+        parse_error = False
         if data:
             try:
-                payload = json.loads(data)
+                payload = codec.decode(data)
             except Exception:
                 log.traceback("Unable to parse JSON")
-                print(data)
-                return NebulaResponse(500, f"Unable to parse response from {url}")
-        else:
-            payload = {}
-
-        message = payload.get("detail", "")
-        payload.pop("detail", None)
-
-        if status is None:
+                print(bytes(data.data()))
+                parse_error = True
+            else:
+                message = payload.pop("detail", "")
+
+        if response.property("aborted"):
+            self.stats.aborted += 1
+        elif parse_error or status is None or status > 399:
+            self.stats.errors += 1
+
+        if parse_error:
+            # Passed to the callback as any other error, so the requests
+            # sharing this reply do not wait for it forever
             status = 500
-            message = "Unable to connect to server"
+            message = f"Unable to parse response from {url}"
+        elif status is None:
+            status = 500
+            if response.property("aborted"):
+                message = f"Request to {url} aborted"
+            elif response.error() == QNetworkReply.NetworkError.OperationCanceledError:
+                message = f"Request to {url} timed out"
+            else:
+                message = "Unable to connect to server"
         elif status > 399:
             message = f"ERROR {status} from {url}\n\n{message}"
 
@@ -138,6 +371,17 @@ class NebulaAPI:
 
         return wrapper
 
+    def awaitable(self, endpoint: str):
+        """Return an awaitable variant of the given endpoint method.
+
+        Usage: `response = await api.awaitable("browse")(view=1)`
+        """
+
+        def wrapper(**kwargs):
+            return self.run_async(endpoint, **kwargs)
+
+        return wrapper
+
 
 api = NebulaAPI()
 asset_cache.api = api
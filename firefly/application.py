@@ -104,6 +104,7 @@ class FireflyApplication(QApplication):
 
     def on_exit(self):
         asset_cache.save()
+        log.debug(f"API connection stats: {api.stats}")
         if not self.main_window.listener:
             return
         if config.site.token:
@@ -140,5 +141,6 @@ class FireflyApplication(QApplication):
                 sys.exit(1)
             source = response["settings"]
 
-        firefly.settings.update(source)
-        clear_cs_cache()
+        changed = firefly.settings.update(source)
+        if changed & {"metatypes", "cs", "folders"}:
+            clear_cs_cache()
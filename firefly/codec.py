@@ -0,0 +1,63 @@
+"""JSON encoding and decoding.
+
+Uses orjson or msgspec when available, falls back to the standard library.
+All functions work with bytes, so the API responses and websocket frames
+can be decoded without converting them to str first.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None  # type: ignore
+
+
+def _as_buffer(data: Any) -> bytes | bytearray | memoryview | str:
+    """Return a buffer the decoders accept.
+
+    QByteArray is converted using its data() method, which
+    returns bytes directly without decoding to str.
+    """
+    if isinstance(data, (bytes, bytearray, memoryview, str)):
+        return data
+    return data.data()
+
+
+if orjson is not None:
+    CODEC = "orjson"
+
+    def encode(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(data: Any) -> Any:
+        return orjson.loads(_as_buffer(data))
+
+elif msgspec is not None:
+    CODEC = "msgspec"
+    _encoder = msgspec.json.Encoder()
+    _decoder = msgspec.json.Decoder()
+
+    def encode(obj: Any) -> bytes:
+        return _encoder.encode(obj)
+
+    def decode(data: Any) -> Any:
+        return _decoder.decode(_as_buffer(data))
+
+else:
+    CODEC = "json"
+
+    def encode(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def decode(data: Any) -> Any:
+        data = _as_buffer(data)
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
@@ -1,7 +1,6 @@
 from PySide6.QtWidgets import QLineEdit
 
-import firefly
-from firefly.metadata.utils import filter_match
+from firefly.metadata import get_cs_options
 
 
 class InputSelect(QLineEdit):
@@ -23,23 +22,7 @@ class InputSelect(QLineEdit):
     def set_field_options(self, **kwargs) -> None:
         self._options = []
         if urn := kwargs.get("cs"):
-            _filter = kwargs.get("filter")
-
-            for opt_value, csmeta in firefly.settings.cs.get(urn, {}).items():
-                if _filter := kwargs.get("filter"):
-                    if not filter_match(_filter, opt_value):
-                        continue
-
-                if csmeta.get("role") in ["hidden", "header"]:
-                    continue
-
-                self._options.append(
-                    {
-                        "value": opt_value,
-                        "title": csmeta.get("title", opt_value),
-                        "description": csmeta.get("description", opt_value),
-                    }
-                )
+            self._options = get_cs_options(urn, kwargs.get("filter"))
 
     def set_value(self, value: str) -> None:
         if value:
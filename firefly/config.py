@@ -11,6 +11,11 @@ class SiteConfiguration(BaseModel):
     name: str = Field(..., title="Site name")
     title: str | None = Field(None, title="Site title")
     token: str | None = Field(None, title="Access token")
+    compress_requests: bool = Field(
+        False,
+        title="Compress requests",
+        description="Gzip large request bodies. The server must support it.",
+    )
 
 
 class FireflyConfig(BaseModel):
@@ -19,6 +24,23 @@ class FireflyConfig(BaseModel):
     client_id: str = Field(default_factory=get_guid, title="Client ID")
     debug: bool = Field(False, title="Debug mode")
 
+    cache_size: int = Field(
+        5000,
+        title="Asset cache size",
+        description="Maximum number of assets kept in memory",
+    )
+    cache_memory: int = Field(
+        64,
+        title="Asset cache memory",
+        description="Approximate memory budget of the asset cache in megabytes",
+    )
+
+    incremental_search: bool = Field(
+        False,
+        title="Incremental search",
+        description="Update browser results while typing the search query",
+    )
+
     sites: list[SiteConfiguration] = Field(
         default_factory=list,
         title="Available sites",
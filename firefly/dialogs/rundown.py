@@ -2,17 +2,9 @@ import functools
 
 from nxtools import s2tc
 from PySide6.QtCore import Qt
-from PySide6.QtWidgets import (
-    QApplication,
-    QDialog,
-    QDialogButtonBox,
-    QPushButton,
-    QVBoxLayout,
-)
-
-from firefly.api import api
+from PySide6.QtWidgets import QDialog, QDialogButtonBox, QPushButton, QVBoxLayout
+
 from firefly.components.form import MetadataForm
-from firefly.log import log
 from firefly.settings import FolderField
 
 #
@@ -138,6 +130,7 @@ class TrimDialog(QDialog):
 
         self.ok = False
         self.item = item
+        self.result = {}
 
         keys = [
             FolderField(name="mark_in"),
@@ -170,22 +163,16 @@ class TrimDialog(QDialog):
         self.close()
 
     def on_accept(self):
-        QApplication.processEvents()
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
-        response = api.set(
-            object_type="item",
-            id=self.item.id,
-            data={
-                "mark_in": self.form["mark_in"],
-                "mark_out": self.form["mark_out"],
-            },
-        )
-        QApplication.restoreOverrideCursor()
-        if not response:
-            log.error(response.message)
+        self.result = {
+            "mark_in": self.form["mark_in"],
+            "mark_out": self.form["mark_out"],
+        }
+        self.ok = True
         self.close()
 
 
 def show_trim_dialog(parent, item):
+    """Ask for new marks of the item. Returns them, or None if cancelled."""
     dlg = TrimDialog(parent, item)
     dlg.exec()
+    return dlg.result if dlg.ok else None
@@ -1,4 +1,3 @@
-import json
 import queue
 import time
 from typing import Any
@@ -6,6 +5,7 @@ from typing import Any
 import websocket
 from PySide6.QtCore import QThread
 
+from firefly import codec
 from firefly.config import config
 from firefly.log import log
 
@@ -64,13 +64,13 @@ class SeismicListener(QThread):
     def on_open(self, *args):
         log.success("[LISTENER] connected", handlers=False)
         self.ws.send(
-            json.dumps(
+            codec.encode(
                 {
                     "topic": "auth",
                     "token": config.site.token,
                     "subscribe": ["*"],
                 }
-            )
+            ).decode("utf-8")
         )
 
     def on_message(self, *args):
@@ -79,7 +79,7 @@ class SeismicListener(QThread):
             log.success("[LISTENER] Got first message!", handlers=False)
             self.active = True
         try:
-            original_payload = json.loads(data)
+            original_payload = codec.decode(data)
             message = SeismicMessage(**original_payload)
         except Exception:
             log.traceback(handlers=False)
@@ -27,7 +27,7 @@ class Logger:
     level = LogLevel.TRACE
     main_window: QMainWindow | None = None
 
-    def __call__(self, level: LogLevel, *args, **kwargs):
+    def __call__(self, level: LogLevel, *args, handlers: bool = True, **kwargs):
         if level < self.level:
             return
         if level < LogLevel.INFO and not config.debug:
@@ -39,6 +39,10 @@ class Logger:
             flush=True,
         )
 
+        # Messages from worker threads must not touch the GUI
+        if not handlers:
+            return
+
         if level >= LogLevel.ERROR:
             if self.main_window:
                 msg = " ".join([str(arg) for arg in args])
@@ -134,8 +134,8 @@ class FireflyMainWidget(QWidget):
             if self.rundown and (self.current_module == self.rundown):
                 if self.rundown.mcr and self.rundown.mcr.isVisible():
                     self.rundown.mcr.request_display_resize = True
-                # Refresh rundown on focus
-                self.rundown.load()
+                # Refresh rundown on focus, unless the cached days are valid
+                self.rundown.load(use_cache=True)
 
             if self.jobs and (self.current_module == self.jobs):
                 self.jobs.load()
@@ -409,7 +409,7 @@ class FireflyMainWindow(QMainWindow):
         ):
             objects = message.data["objects"]
             log.debug(f"[MAIN WINDOW] {len(objects)} asset(s) have been changed")
-            asset_cache.request([[aid, message.timestamp + 1] for aid in objects])
+            asset_cache.revalidate(objects)
             return
 
         if message.method == "config_changed":
@@ -425,5 +425,7 @@ class FireflyMainWindow(QMainWindow):
 
         self.browser.refresh_assets(*assets)
         self.detail.refresh_assets(*assets)
+        if self.jobs:
+            self.jobs.refresh_assets(*assets)
         if self.rundown:
             self.rundown.refresh_assets(*assets)
@@ -1,4 +1,3 @@
-import copy
 from typing import Any
 
 from nxtools import unaccent
@@ -6,7 +5,7 @@ from pydantic import BaseModel
 
 import firefly
 
-from .utils import CachedObject, filter_match
+from .utils import CachedObject, compile_filter
 
 TYPE_DEFAULTS = {
     -1: None,
@@ -30,9 +29,14 @@ class ClassificationScheme(metaclass=CachedObject):
         self.urn = urn
         self.csdata = dict(firefly.settings.cs.get(urn, []))
         if filter is not None:
-            self.valid_keys = [r for r in self.csdata if filter_match(filter, r)]
+            match = compile_filter(filter)
+            self.valid_keys = [r for r in self.csdata if match(r)]
         else:
             self.valid_keys = list(self.csdata.keys())
+        self._valid = set(self.valid_keys)
+
+    def __contains__(self, value):
+        return value in self._valid
 
     def __getitem__(self, value):
         return self.csdata.get(value, {})
@@ -66,68 +70,138 @@ class MetaType(BaseModel):
     filter: str | None = None
     required: bool = False
 
-    # @functools.cached_property
     @property
     def csdata(self):
         cs = self.cs or "urn:special-nonexistent-cs"
-        _filter = self.filter
-        if type(_filter) == list:
-            _filter = tuple(_filter)
-        return ClassificationScheme(cs, _filter)
+        return ClassificationScheme(cs, _filter_key(self.filter))
 
-    # @functools.cached_property
     @property
     def cslist(self):
-        if self.order is None:
-            order = "value"
-        else:
-            order = self.order
-
-        items = [
-            {
-                "value": value,
-                "title": item.get("title", value),
-                "description": item.get("description", ""),
-                "role": item.get("role", "option"),
-                "indent": len(value.split(".")),
-            }
-            for value, item in self.csdata.csdata.items()
-            if value in self.csdata.valid_keys
-        ]
-        if order == "value":
-            items.sort(key=lambda x: x["value"])
-        elif order in ["title", "alias"]:
-            items.sort(key=lambda x: unaccent(x["title"]))
-
-        return items
+        return get_cslist(self.cs, self.filter, self.order or "value")
+
+
+def _filter_key(_filter):
+    if type(_filter) is list:
+        return tuple(_filter)
+    return _filter
+
+
+# Sorted CS option lists by (urn, filter, order) and CS options
+# offered by the input widgets by (urn, filter).
+# Cleared by clear_cs_cache.
+_cslist_cache: dict[tuple, list[dict[str, Any]]] = {}
+_cs_options_cache: dict[tuple, list[dict[str, Any]]] = {}
+
+
+def get_cslist(urn, filter=None, order="value") -> list[dict[str, Any]]:
+    """Return the sorted items of a classification scheme.
+
+    The result is cached and shared, so it must not be modified.
+    """
+    key = (urn, _filter_key(filter), order)
+    try:
+        return _cslist_cache[key]
+    except KeyError:
+        pass
+
+    cs = ClassificationScheme(urn or "urn:special-nonexistent-cs", key[1])
+    items = [
+        {
+            "value": value,
+            "title": cs.title(value),
+            "description": cs[value].get("description", ""),
+            "role": cs.role(value),
+            "indent": len(value.split(".")),
+        }
+        for value in cs.valid_keys
+    ]
+    if order == "value":
+        items.sort(key=lambda x: x["value"])
+    elif order in ["title", "alias"]:
+        items.sort(key=lambda x: unaccent(x["title"]))
+
+    _cslist_cache[key] = items
+    return items
+
+
+def get_cs_options(urn, filter=None) -> list[dict[str, Any]]:
+    """Return the selectable options of a classification scheme.
+
+    Hidden items and headers are omitted, the CS order is kept.
+    The result is cached and shared, so it must not be modified.
+    """
+    key = (urn, _filter_key(filter) or None)
+    try:
+        return _cs_options_cache[key]
+    except KeyError:
+        pass
+
+    cs = ClassificationScheme(urn, key[1])
+    options = [
+        {
+            "value": value,
+            "title": cs.title(value),
+            "description": cs.description(value),
+        }
+        for value in cs.valid_keys
+        if cs.role(value) not in ["hidden", "header"]
+    ]
+    _cs_options_cache[key] = options
+    return options
 
 
 def _folder_metaset(id_folder):
-    return firefly.settings.get_folder(id_folder).fields
+    if not (folder := firefly.settings.get_folder(id_folder)):
+        return []
+    return folder.fields
+
+
+# Site-wide metatypes shared by all registries. Rebuilt when the
+# generation changes (see clear_cs_cache).
+_generation = 0
+_base_meta_types: dict[str, MetaType] | None = None
+_registries: dict[Any, "MetaTypes"] = {}
+
+
+def _get_base_meta_types() -> dict[str, MetaType]:
+    global _base_meta_types
+    if _base_meta_types is None:
+        _base_meta_types = {}
+        for name, mset in firefly.settings.metatypes.items():
+            mt = MetaType(name=name, **mset)
+            if mt.default is None:
+                mt.default = TYPE_DEFAULTS[mt.type]
+            _base_meta_types[name] = mt
+    return _base_meta_types
+
+
+class MetaTypes:
+    """Metatype registry, optionally with per-folder overrides.
 
+    The site metatypes are shared by all registries. A folder registry
+    only holds copies of the metatypes its folder overrides, and a merged
+    lookup table referencing the shared ones for the rest.
+
+    Use get_meta_types() to get the cached registry of a folder.
+    """
 
-class MetaTypes(metaclass=CachedObject):
     def __init__(self, id_folder=None):
         self.id_folder = id_folder
-        self._meta_types = None
+        self._generation = -1
+        self._meta_types: dict[str, MetaType] = {}
 
     @property
-    def meta_types(self):
-        if not self._meta_types:
-            self._meta_types = {}
-            for name, mset in firefly.settings.metatypes.items():
-                mt = MetaType(name=name, **mset)
-                if mt.default is None:
-                    mt.default = TYPE_DEFAULTS[mt.type]
-                self._meta_types[name] = mt
-
+    def meta_types(self) -> dict[str, MetaType]:
+        if self._generation != _generation:
+            base = _get_base_meta_types()
+            overrides = {}
             if self.id_folder:
-                self._meta_types = copy.deepcopy(self._meta_types)
                 for ffield in _folder_metaset(self.id_folder):
-                    mt = self._meta_types[ffield.name]
-                    for k, v in ffield.dict().items():
-                        mt.__setattr__(k, v)
-                    self._meta_types[ffield.name] = mt
+                    if (mt := base.get(ffield.name)) is None:
+                        continue
+                    overrides[ffield.name] = mt.copy(update=ffield.dict())
+            self._meta_types = {**base, **overrides} if overrides else base
+            self._generation = _generation
         return self._meta_types
 
     def __contains__(self, name):
@@ -140,9 +214,34 @@ class MetaTypes(metaclass=CachedObject):
         return self.meta_types.__iter__()
 
 
-meta_types = MetaTypes()
+def get_meta_types(id_folder=None) -> MetaTypes:
+    """Return the metatype registry of the given folder."""
+    try:
+        return _registries[id_folder]
+    except KeyError:
+        registry = _registries[id_folder] = MetaTypes(id_folder)
+        return registry
+
+
+meta_types = get_meta_types()
+
+
+def get_generation() -> int:
+    """Return a counter incremented whenever the metadata caches are cleared.
+
+    Objects caching values derived from metatypes, classification schemes
+    or folders compare it to detect a settings reload.
+    """
+    return _generation
 
 
 def clear_cs_cache():
-    MetaTypes.clear_cache()
+    global _generation, _base_meta_types
+    _generation += 1
+    _base_meta_types = None
+    _registries.clear()
+    _registries[None] = meta_types
+    _cslist_cache.clear()
+    _cs_options_cache.clear()
+    compile_filter.cache_clear()
     ClassificationScheme.clear_cache()
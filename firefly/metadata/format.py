@@ -1,4 +1,4 @@
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Callable
 
 from nxtools import format_filesize, format_time, s2tc
 
@@ -73,3 +73,95 @@ def format_meta(
             return f"#{value:06x}"
 
     return str(value)
+
+
+def compile_formatter(parent, key: str) -> Callable[["BaseObject"], str]:
+    """Return a function formatting the given key of an object.
+
+    The result is the same as of format_meta, but the dispatch on the key
+    and the metatype is done once, so formatting many objects (e.g. all
+    cells of a view column) costs just a function call per object.
+    """
+
+    fmt: Callable[[Any], str]
+
+    match key:
+        case "title" | "subtitle" | "description":
+            fmt = _identity
+        case "content_type":
+            fmt = _enum_formatter(ContentType)
+        case "media_type":
+            fmt = _enum_formatter(MediaType)
+        case "status":
+            fmt = _enum_formatter(ObjectStatus)
+        case "qc/state":
+            fmt = _enum_formatter(QCState)
+        case "duration":
+            fmt = s2tc
+        case "file/size":
+            fmt = format_filesize
+        case "id_folder":
+            fmt = _format_folder
+        case _:
+            fmt = _metatype_formatter(parent[key])
+
+    def formatter(object: "BaseObject") -> str:
+        if not (value := object.get(key)):
+            return ""
+        return fmt(value)
+
+    return formatter
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _enum_formatter(enum_class) -> Callable[[Any], str]:
+    names = {member.value: member.name for member in enum_class}
+
+    def fmt(value: Any) -> str:
+        try:
+            return names[int(value)]
+        except KeyError:
+            return enum_class(int(value)).name
+
+    return fmt
+
+
+def _format_folder(value: Any) -> str:
+    if not (folder := settings.get_folder(value)):
+        return "UNKNOWN"
+    return folder.name
+
+
+def _metatype_formatter(meta_type: "MetaType | None") -> Callable[[Any], str]:
+    if meta_type is None:
+        return str
+
+    match meta_type.type:
+        case "string" | "text" | "integer":
+            return str
+        case "numeric":
+            return lambda value: str(round(value, 3))
+        case "boolean":
+            return lambda value: "yes" if value else "no"
+        case "datetime":
+            time_format = meta_type.format or "%Y-%m-%d %H:%M:%S"
+            return lambda value: format_time(value, time_format=time_format)
+        case "timecode":
+            return s2tc
+        case "select" | "list":
+            if meta_type.cs is None:
+                if meta_type.type == "select":
+                    return str
+                return lambda values: ",".join(values)
+            cs = meta_type.csdata
+            titles = {value: cs.title(value) for value in cs.csdata}
+            if meta_type.type == "select":
+                return lambda value: titles.get(value, value)
+            return lambda values: ", ".join([titles.get(v, v) for v in values])
+        case "color":
+            return lambda value: f"#{value:06x}"
+
+    return str
@@ -1,3 +1,4 @@
+import functools
 import re
 
 
@@ -10,15 +11,23 @@ def shorten(instr, nlen):
     return line[:nlen] + "..."
 
 
-def filter_match(f, r):
-    """Match filter with OR."""
-    if type(f) in [list, tuple]:
-        for fl in f:
-            if re.match(fl, r):
-                return True
-        return False
-    else:
-        return re.match(f, r)
+@functools.lru_cache(maxsize=256)
+def compile_filter(f):
+    """Return a match function of a filter.
+
+    A list of patterns is matched with OR and compiled to a single
+    regular expression. An empty list does not match anything.
+    """
+    if type(f) not in [list, tuple]:
+        return re.compile(f).match
+    if not f:
+        return re.compile("(?!)").match
+    try:
+        return re.compile("|".join(f"(?:{fl})" for fl in f)).match
+    except re.error:
+        # Patterns with global flags cannot be joined
+        patterns = [re.compile(fl) for fl in f]
+        return lambda r: any(p.match(r) for p in patterns)
 
 
 def tree_indent(data):
@@ -2,17 +2,15 @@ import copy
 import functools
 
 from nxtools import s2time
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QAction, QIcon
 from PySide6.QtWidgets import (
     QAbstractItemView,
     QApplication,
     QHBoxLayout,
-    QLabel,
     QLineEdit,
     QMenu,
     QMessageBox,
-    QPushButton,
     QTabWidget,
     QToolBar,
     QVBoxLayout,
@@ -22,6 +20,7 @@ from PySide6.QtWidgets import (
 import firefly
 from firefly.api import api
 from firefly.base_module import BaseModule
+from firefly.config import config
 from firefly.dialogs.batch_ops import show_batch_ops_dialog
 from firefly.dialogs.send_to import show_send_to_dialog
 from firefly.enum import ObjectStatus
@@ -32,14 +31,31 @@ from firefly.view import FireflyView
 
 from .browser_model import BrowserModel
 
+# Delay (ms) after the last keystroke before the incremental search starts
+SEARCH_DELAY = 300
+
 
 class SearchWidget(QLineEdit):
     def __init__(self, parent):
         super(SearchWidget, self).__init__(parent)
         self.browser = parent
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY)
+        self.search_timer.timeout.connect(self.on_search_timer)
+        if config.incremental_search:
+            self.textEdited.connect(self.on_text_edited)
+
+    def on_text_edited(self, text):
+        self.browser.filter_rows(text)
+        self.search_timer.start()
+
+    def on_search_timer(self):
+        self.browser.load()
 
     def keyPressEvent(self, event):
         if event.key() in [Qt.Key.Key_Return, Qt.Key.Key_Enter]:
+            self.search_timer.stop()
             self.browser.load()
         elif event.key() == Qt.Key.Key_Escape:
             self.line_edit.setText("")
@@ -51,8 +67,6 @@ class SearchWidget(QLineEdit):
 class FireflyBrowserView(FireflyView):
     def __init__(self, parent):
         super(FireflyBrowserView, self).__init__(parent)
-        self.current_page = 1
-        self.page_count = 1
         self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.activated.connect(self.on_activate)
         self.setModel(BrowserModel(self))
@@ -69,6 +83,8 @@ class FireflyBrowserView(FireflyView):
                 continue
             rows.append(row)
             obj = self.model().object_data[row]
+            if not obj.id:
+                continue  # Not loaded yet
             self.selected_objects.append(obj)
             if obj.object_type in ["asset", "item"]:
                 tot_dur += obj.duration
@@ -78,11 +94,7 @@ class FireflyBrowserView(FireflyView):
             mtimes = [obj["mtime"] for obj in self.selected_objects]
 
             asset_cache.request(list(zip(ids, mtimes)))
-            asset = asset_cache[ids[0]]
-            if not asset:
-                asset_cache.wait()
-                asset = asset_cache[ids[0]]
-            self.main_window.focus(asset)
+            asset_cache.fetch(ids[0], self.on_asset_ready)
 
             if len(self.selected_objects) > 1 and tot_dur:
                 log.status(
@@ -91,6 +103,10 @@ class FireflyBrowserView(FireflyView):
                 )
         super(FireflyView, self).selectionChanged(selected, deselected)
 
+    def on_asset_ready(self, asset):
+        if self.selected_objects and self.selected_objects[0].id == asset.id:
+            self.main_window.focus(asset)
+
     def on_header_clicked(self, index):
         old_order_by = self.parent().search_query.get("order_by", "ctime")
         old_order_dir = self.parent().search_query.get("order_dir", "ctime")
@@ -115,63 +131,6 @@ class FireflyBrowserView(FireflyView):
         QApplication.clipboard().setText(str(val))
         log.status(f'[BROWSER] Copied "{val}" to clipboard')
 
-    def set_page(self, current_page, page_count):
-        self.current_page = current_page
-        self.page_count = page_count
-        if self.page_count > 1:
-            self.parent().pager.show()
-        else:
-            self.parent().pager.hide()
-
-        if self.current_page == 1:
-            self.parent().pager.btn_prev.setEnabled(False)
-        else:
-            self.parent().pager.btn_prev.setEnabled(True)
-
-        if self.current_page == page_count:
-            self.parent().pager.btn_next.setEnabled(False)
-        else:
-            self.parent().pager.btn_next.setEnabled(True)
-
-        self.parent().pager.info.setText(f"Page {current_page}")
-
-
-class PagerButton(QPushButton):
-    pass
-
-
-class Pager(QWidget):
-    def __init__(self, parent):
-        layout = QHBoxLayout()
-        super(Pager, self).__init__(parent)
-        self._parent = parent
-
-        self.btn_prev = PagerButton()
-        self.btn_prev.setIcon(QIcon(pixlib["previous"]))
-        self.btn_prev.clicked.connect(self.on_prev)
-        layout.addWidget(self.btn_prev, 0)
-
-        self.info = QLabel("Page 1")
-        self.info.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(self.info, 1)
-
-        self.btn_next = PagerButton()
-        self.btn_next.setIcon(QIcon(pixlib["next"]))
-        self.btn_next.clicked.connect(self.on_next)
-        layout.addWidget(self.btn_next, 0)
-
-        layout.setContentsMargins(0, 0, 0, 0)
-        self.setLayout(layout)
-
-    def on_prev(self):
-        if self._parent.view.current_page > 1:
-            self._parent.view.current_page -= 1
-            self._parent.load()
-
-    def on_next(self):
-        self._parent.view.current_page += 1
-        self._parent.load()
-
 
 class BrowserTab(QWidget):
     def __init__(self, parent, **kwargs):
@@ -197,7 +156,11 @@ class BrowserTab(QWidget):
             self.search_box.setText(self.search_query["fulltext"])
 
         self.first_load = True
+        self.filter_text = ""
         self.view = FireflyBrowserView(self)
+        self.model().rowsInserted.connect(self.on_rows_inserted)
+        self.model().dataChanged.connect(self.on_rows_changed)
+        self.model().layoutChanged.connect(self.on_layout_changed)
         self.view.horizontalHeader().sectionResized.connect(self.on_section_resize)
         self.view.horizontalHeader().sortIndicatorChanged.connect(
             self.on_section_resize
@@ -228,13 +191,10 @@ class BrowserTab(QWidget):
         search_layout.setContentsMargins(0, 0, 0, 0)
         search_layout.addWidget(toolbar)
 
-        self.pager = Pager(self)
-
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addLayout(search_layout, 0)
         layout.addWidget(self.view, 1)
-        layout.addWidget(self.pager, 0)
         self.setLayout(layout)
 
     def model(self):
@@ -292,8 +252,6 @@ class BrowserTab(QWidget):
         search_string = self.search_box.text()
         self.search_query["fulltext"] = search_string
         self.search_query.update(kwargs)
-        if self.search_query.get("id_view") != self.old_view:
-            self.view.current_page = 1
         self.model().load(self.load_callback, **self.search_query)
 
     def load_callback(self):
@@ -324,8 +282,37 @@ class BrowserTab(QWidget):
             self.first_load = False
 
         self.loading = False
+        self.filter_rows("")
         self._parent.redraw_tabs()
 
+    def filter_rows(self, text):
+        """Show only the loaded rows matching the text, until the next load.
+
+        Rows loaded or changed meanwhile are filtered as well.
+        """
+        if not (text or self.filter_text):
+            return
+        self.filter_text = text
+        self.apply_filter(0, len(self.model().object_data) - 1)
+
+    def apply_filter(self, first, last):
+        text = self.filter_text
+        rows = self.model().search_index.search(text) if text else None
+        for row in range(first, last + 1):
+            self.view.setRowHidden(row, rows is not None and row not in rows)
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.filter_text:
+            self.apply_filter(first, last)
+
+    def on_rows_changed(self, top_left, bottom_right, roles=None):
+        if self.filter_text:
+            self.apply_filter(top_left.row(), bottom_right.row())
+
+    def on_layout_changed(self, *args):
+        if self.filter_text:
+            self.apply_filter(0, len(self.model().object_data) - 1)
+
     def on_clear(self):
         self.search_box.setText("")
         self.load(fulltext="")
@@ -545,6 +532,7 @@ class BrowserTab(QWidget):
     def refresh_assets(self, *objects, request_data=False):
         if request_data:
             asset_cache.request([[aid, 0] for aid in objects])
+        self.model().drop_cached(objects)
         for row, obj in enumerate(self.model().object_data):
             if obj.id in objects:
                 self.model().object_data[row] = asset_cache[obj.id]
@@ -1,72 +1,355 @@
 import functools
 import json
+import time
+from collections import OrderedDict
 
-from PySide6.QtCore import QMimeData, Qt, QUrl
+from PySide6.QtCore import QMimeData, QModelIndex, Qt, QTimer, QUrl
 from PySide6.QtWidgets import QApplication
 
 import firefly
-from firefly.api import api
+from firefly.api import NebulaResponse, api
 from firefly.log import log
 from firefly.objects import Asset
+from firefly.objects.asset import asset_loading
 from firefly.qt import pixlib
-from firefly.view import FireflyViewModel, format_description, format_header
+from firefly.view import (
+    FireflyViewModel,
+    format_description,
+    format_header,
+    row_ranges,
+)
 
 DEFAULT_HEADER_DATA = ["title", "duration", "id_folder"]
-RECORDS_PER_PAGE = 1000
+
+# Number of assets fetched at once as the view is scrolled
+WINDOW_SIZE = 500
+
+# Maximum number of windows kept in memory. The least recently displayed
+# windows are evicted and fetched again when they are scrolled back to.
+MAX_WINDOWS = 8
+
+# Windows adjacent to the displayed one are fetched in the background
+# PREFETCH_DELAY (ms) after it is loaded. At most PREFETCH_LIMIT responses
+# are kept until the view needs them.
+PREFETCH_DELAY = 250
+PREFETCH_LIMIT = 4
+
+# Number of recent query results (first windows) kept, so repeated
+# queries (e.g. when editing the search text) are shown immediately.
+# Results older than RECENT_MAX_AGE (seconds) are not used.
+RECENT_LIMIT = 8
+RECENT_MAX_AGE = 60
+
+
+def query_key(query: dict, window: int) -> tuple:
+    return (*sorted(query.items()), window)
 
 
 class BrowserModel(FireflyViewModel):
-    def load(self, callback, **kwargs):
+    """Browser result loaded in windows as the view is scrolled.
+
+    The first window is loaded by load(), the following ones by fetchMore()
+    when the view reaches the end of the loaded rows. Rows of evicted
+    windows are replaced by a placeholder and fetched again on display.
+    """
 
+    def __init__(self, parent):
+        super(BrowserModel, self).__init__(parent)
+        self.query: dict = {}
+        self.has_more = False
+        self.windows: OrderedDict[int, None] = OrderedDict()
+        self.pending: set[int] = set()
+        self.prefetched: OrderedDict[tuple, NebulaResponse] = OrderedDict()
+        self.recent: OrderedDict[tuple, tuple[float, NebulaResponse]] = OrderedDict()
+        self.generation = 0
+        # Handlers of the requests in flight by window (None for a refresh)
+        self.requests: dict[int | None, functools.partial] = {}
+
+    def load(self, callback, **kwargs):
         try:
             id_view = kwargs["id_view"]
-            self.header_data = firefly.settings.get_view(id_view).columns
+            header_data = firefly.settings.get_view(id_view).columns
         except KeyError:
-            self.header_data = DEFAULT_HEADER_DATA
+            header_data = DEFAULT_HEADER_DATA
 
-        api.browse(
-            functools.partial(self.load_callback, callback),
+        query = {
             # TODO: V6
-            view=kwargs["id_view"],
-            query=kwargs["fulltext"],
-            limit=RECORDS_PER_PAGE + 1,
-            order_by=kwargs["order_by"],
-            order_dir=kwargs["order_dir"],
-            offset=(self.parent().current_page - 1) * RECORDS_PER_PAGE,
+            "view": kwargs["id_view"],
+            "query": kwargs["fulltext"],
+            "order_by": kwargs["order_by"],
+            "order_dir": kwargs["order_dir"],
+        }
+
+        if query == self.query and header_data == self.header_data and self.windows:
+            self.drop_cached()
+            self.refresh(callback)
+            return
+
+        # Responses to the previous query are not needed anymore
+        for handler in self.requests.values():
+            api.cancel(handler)
+        self.requests = {}
+        self.generation += 1
+
+        self.query = query
+        self.has_more = False
+        self.windows = OrderedDict()
+        self.pending = set()
+        self.fetch(0, callback=callback, header_data=header_data, reset=True)
+
+    def fetch(self, window, callback=None, header_data=None, reset=False):
+        self.pending.add(window)
+        query = dict(self.query)
+        handler = functools.partial(
+            self.fetch_callback,
+            self.generation,
+            query,
+            window,
+            reset,
+            header_data,
+            callback,
+        )
+        key = query_key(query, window)
+        response = self.prefetched.pop(key, None)
+        if reset and (recent := self.recent.get(key)):
+            if time.time() - recent[0] < RECENT_MAX_AGE:
+                response = recent[1]
+        if response:
+            # Delivered from the event loop, as this may be called from data()
+            QTimer.singleShot(0, functools.partial(handler, response))
+            return
+        self.requests[window] = handler
+        api.browse(
+            handler,
+            limit=WINDOW_SIZE + 1,
+            offset=window * WINDOW_SIZE,
+            **query,
         )
 
-    def load_callback(self, callback, response):
-        self.beginResetModel()
-        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+    def fetch_callback(
+        self, generation, query, window, reset, header_data, callback, response
+    ):
+        if generation != self.generation:
+            return  # Response to a previous query
+        self.pending.discard(window)
+        requested = self.requests.pop(window, None) is not None
+
+        if response and requested and window == 0:
+            key = query_key(query, 0)
+            self.recent[key] = (time.time(), response)
+            self.recent.move_to_end(key)
+            while len(self.recent) > RECENT_LIMIT:
+                self.recent.popitem(last=False)
 
         if not response:
             log.error(response.message)
 
-        # Pagination
+        data = response.data or []
+        has_more = len(data) > WINDOW_SIZE
+        objects = Asset.from_list(data[:WINDOW_SIZE])
+
+        if reset:
+            QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+            self.windows = OrderedDict({0: None})
+            self.has_more = has_more
+            self.update_object_data(objects, header_data)
+            QApplication.restoreOverrideCursor()
+        elif response:
+            self.set_window(window, objects, has_more)
+        else:
+            # Do not request the failed window again until it is evicted
+            self.windows[window] = None
+
+        if response:
+            QTimer.singleShot(
+                PREFETCH_DELAY, functools.partial(self.prefetch_adjacent, query, window)
+            )
 
-        current_page = self.parent().current_page
+        if callback:
+            callback()
 
-        if len(response.data) > RECORDS_PER_PAGE:
-            page_count = current_page + 1
-        elif len(response.data) == 0:
-            page_count = max(1, current_page - 1)
+    def refresh(self, callback=None):
+        """Load the loaded rows again, matching them by asset id.
+
+        The selection and the scroll position follow the assets,
+        so inserting or deleting an asset does not change the other rows.
+        """
+        windows = max(1, (len(self.object_data) + WINDOW_SIZE - 1) // WINDOW_SIZE)
+        count = windows * WINDOW_SIZE
+        handler = functools.partial(
+            self.refresh_callback,
+            self.generation,
+            dict(self.query),
+            count,
+            callback,
+        )
+        self.requests[None] = handler
+        api.browse(handler, limit=count + 1, offset=0, **self.query)
+
+    def refresh_callback(self, generation, query, count, callback, response):
+        if generation != self.generation or query != self.query:
+            return
+        self.requests.pop(None, None)
+        if not response:
+            log.error(response.message)
         else:
-            page_count = current_page
+            data = response.data or []
+            objects = Asset.from_list(data[:count])
+            windows = range((len(objects) + WINDOW_SIZE - 1) // WINDOW_SIZE)
+            # Refreshed windows which were not displayed are evicted again
+            self.windows = OrderedDict.fromkeys(
+                [w for w in windows if w not in self.windows]
+                + [w for w in self.windows if w in windows]
+            )
+            self.has_more = len(data) > count
+            self.update_object_data(objects)
+            self.evict()
+        if callback:
+            callback()
 
-        if current_page > page_count:
-            current_page = page_count
+    #
+    # Prefetch
+    #
 
-        # Replace object data
+    def prefetch_adjacent(self, query, window):
+        """Fetch the windows around the given one, if they are not loaded."""
+        if query != self.query:
+            return
+        count = len(self.object_data)
+        for adjacent in [window + 1, window - 1]:
+            first = adjacent * WINDOW_SIZE
+            if adjacent < 0 or adjacent in self.windows or adjacent in self.pending:
+                continue
+            if first > count or (first == count and not self.has_more):
+                continue
+            self.prefetch(adjacent)
 
-        if len(response.data) > RECORDS_PER_PAGE:
-            response.data.pop(-1)
-        self.object_data = [Asset(meta=m) for m in response.data]
+    def prefetch(self, window):
+        key = query_key(self.query, window)
+        if key in self.prefetched:
+            return
+        api.browse(
+            functools.partial(self.prefetch_callback, self.query, window),
+            limit=WINDOW_SIZE + 1,
+            offset=window * WINDOW_SIZE,
+            **self.query,
+        )
 
-        self.parent().set_page(current_page, page_count)
-        self.endResetModel()
-        QApplication.restoreOverrideCursor()
+    def prefetch_callback(self, query, window, response):
+        if not response:
+            return
+        if query == self.query and (window in self.windows or window in self.pending):
+            return  # Already used by fetch
+        self.prefetched[query_key(query, window)] = response
+        while len(self.prefetched) > PREFETCH_LIMIT:
+            self.prefetched.popitem(last=False)
+
+    def drop_cached(self, ids=None):
+        """Drop prefetched and recent results containing any of the given assets.
+
+        All cached results are dropped when no ids are given.
+        """
+        if ids is None:
+            self.prefetched.clear()
+            self.recent.clear()
+            return
+        ids = set(ids)
+        for key, response in list(self.prefetched.items()):
+            if any(meta.get("id") in ids for meta in response.data):
+                del self.prefetched[key]
+        for key, (_, response) in list(self.recent.items()):
+            if any(meta.get("id") in ids for meta in response.data):
+                del self.recent[key]
+
+    def set_window(self, window, objects, has_more):
+        """Replace the rows of a window, appending or truncating the result.
+
+        Used for windows fetched as the view is scrolled. Refreshed rows
+        are matched by id in refresh_callback instead.
+        """
+        parent = QModelIndex()
+        first = window * WINDOW_SIZE
+        count = len(self.object_data)
+        if first > count:
+            return
+        end = first + len(objects)
+        last_column = len(self.header_data) - 1
 
-        callback()
+        if end < count and not has_more:
+            # The result is shorter than it used to be
+            self.beginRemoveRows(parent, end, count - 1)
+            del self.object_data[end:]
+            self.endRemoveRows()
+            for w in [w for w in self.windows if w * WINDOW_SIZE >= end]:
+                del self.windows[w]
+            count = end
+
+        common = min(end, count) - first
+        changed = [
+            row
+            for row, obj in enumerate(objects[:common], first)
+            if self.object_data[row].meta != obj.meta
+        ]
+        updated = slice(first, first + common)
+        self.object_data[updated] = objects[:common]
+        for top, bottom in row_ranges(changed):
+            self.dataChanged.emit(self.index(top, 0), self.index(bottom, last_column))
+
+        if end > count:
+            self.beginInsertRows(parent, count, end - 1)
+            self.object_data.extend(objects[common:])
+            self.endInsertRows()
+
+        if end >= len(self.object_data):
+            self.has_more = has_more
+        self.windows[window] = None
+        self.windows.move_to_end(window)
+        self.evict()
+
+    def evict(self):
+        last_column = len(self.header_data) - 1
+        while len(self.windows) > MAX_WINDOWS:
+            window, _ = self.windows.popitem(last=False)
+            first = window * WINDOW_SIZE
+            last = min(first + WINDOW_SIZE, len(self.object_data)) - 1
+            if last < first:
+                continue
+            evicted = slice(first, last + 1)
+            self.object_data[evicted] = [
+                Asset.from_trusted(asset_loading.meta) for _ in range(first, last + 1)
+            ]
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+    def row_key(self, obj):
+        if obj.id is None:
+            return ("loading", id(obj))  # Placeholder of an evicted window
+        return obj.id
+
+    def search_texts(self, obj):
+        if not obj.id:
+            return []  # Placeholder of an evicted window
+        return super(BrowserModel, self).search_texts(obj)
+
+    def canFetchMore(self, parent):
+        if parent.isValid():
+            return False
+        return self.has_more
+
+    def fetchMore(self, parent):
+        if parent.isValid() or not self.has_more:
+            return
+        window = len(self.object_data) // WINDOW_SIZE
+        if window not in self.pending:
+            self.fetch(window)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if index.isValid():
+            window = index.row() // WINDOW_SIZE
+            if window in self.windows:
+                self.windows.move_to_end(window)
+            elif window not in self.pending:
+                self.fetch(window)
+        return super(BrowserModel, self).data(index, role)
 
     def headerData(
         self,
@@ -107,6 +390,8 @@ class BrowserModel(FireflyViewModel):
                 continue
             if not index.isValid():
                 continue
+            if not self.object_data[index.row()].id:
+                continue
             rows.append(index.row())
 
         data = [self.object_data[row].meta for row in rows]
@@ -94,3 +94,12 @@ class JobsModule(BaseModule):
 
         if do_reload:
             self.view.model.load()
+
+    def refresh_assets(self, *assets):
+        model = self.view.model
+        for row, job in enumerate(model.object_data):
+            if job["id_asset"] in assets:
+                model.dataChanged.emit(
+                    model.index(row, 0),
+                    model.index(row, len(model.header_data) - 1),
+                )
@@ -29,7 +29,7 @@ def job_format(data, key):
             return ""
         return format_time(data[key])
     elif key == "title":
-        return asset_cache[data["id_asset"]]["title"]
+        return asset_cache.get(data["id_asset"])["title"]
     elif key == "action":
         return data["action_name"]
     elif key == "service":
@@ -115,7 +115,7 @@ class JobsModel(FireflyViewModel):
         if role == Qt.ItemDataRole.DisplayRole:
             return job_format(obj, key)
         elif role == Qt.ItemDataRole.ToolTipRole:
-            return f"{obj['message']}\n\n{asset_cache[obj['id_asset']]}"
+            return f"{obj['message']}\n\n{asset_cache.get(obj['id_asset'])}"
         elif role == Qt.ItemDataRole.ForegroundRole:
             if key == "progress":
                 return colors[obj["status"]]
@@ -155,7 +155,12 @@ class FireflyJobsView(FireflyView):
         super(FireflyView, self).selectionChanged(selected, deselected)
         sel = self.selected_jobs
         if len(sel) == 1:
-            self.parent().main_window.focus(asset_cache[sel[0]["id_asset"]])
+            asset_cache.fetch(sel[0]["id_asset"], self.on_asset_ready)
+
+    def on_asset_ready(self, asset):
+        sel = self.selected_jobs
+        if len(sel) == 1 and sel[0]["id_asset"] == asset.id:
+            self.parent().main_window.focus(asset)
 
     @property
     def selected_jobs(self):
@@ -188,19 +193,23 @@ class FireflyJobsView(FireflyView):
         menu.exec(event.globalPos())
 
     def on_restart(self, jobs):
-        for job in jobs:
-            response = api.jobs(restart=job)
-            if not response:
-                log.error(response.message)
-            else:
-                log.info(response.message)
-        self.model.load()
+        self.run_job_action("restart", jobs)
 
     def on_abort(self, jobs):
-        for job in jobs:
-            response = api.jobs(abort=job)
+        self.run_job_action("abort", jobs)
+
+    def run_job_action(self, action, jobs):
+        """Send the action for all jobs at once and reload when all are done."""
+        pending = set(jobs)
+
+        def on_response(job, response):
             if not response:
                 log.error(response.message)
             else:
                 log.info(response.message)
-            self.model.load()
+            pending.discard(job)
+            if not pending:
+                self.model.load()
+
+        for job in jobs:
+            api.jobs(functools.partial(on_response, job), **{action: job})
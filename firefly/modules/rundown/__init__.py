@@ -1,8 +1,9 @@
+import bisect
 import datetime
 import functools
 import time
 
-from PySide6.QtCore import QItemSelection, QItemSelectionModel, QModelIndex
+from PySide6.QtCore import QItemSelection, QItemSelectionModel, QModelIndex, QTimer
 from PySide6.QtWidgets import QAbstractItemView, QInputDialog, QVBoxLayout
 
 import firefly
@@ -11,9 +12,23 @@ from firefly.log import log
 
 from .mcr import MCR
 from .plugins import PlayoutPlugins
-from .utils import day_start, get_date, rundown_toolbar
+from .utils import (
+    day_start,
+    get_date,
+    next_day_start,
+    prev_day_start,
+    rundown_toolbar,
+)
 from .view import RundownView
 
+# Rundown changes reported by the server within RELOAD_DELAY (ms)
+# are applied with a single reload
+RELOAD_DELAY = 100
+
+# Yesterday, today and tomorrow are loaded to the rundown cache
+# in the background PREFETCH_DELAY (ms) after they are invalidated
+PREFETCH_DELAY = 2000
+
 
 class RundownModule(BaseModule):
     def __init__(self, parent):
@@ -24,6 +39,17 @@ class RundownModule(BaseModule):
         self.last_search = ""
         self.first_load = True
 
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(RELOAD_DELAY)
+        self.reload_timer.timeout.connect(self.reload)
+
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_DELAY)
+        self.prefetch_timer.timeout.connect(self.prefetch)
+        self.prefetch_timer.start()
+
         self.edit_wanted = self.app_state.get("edit_enabled", True)
         self.edit_enabled = False
 
@@ -78,6 +104,7 @@ class RundownModule(BaseModule):
     def load(self, **kwargs):
         event = kwargs.get("event", False)
         go_to_now = kwargs.get("go_to_now", False)
+        use_cache = kwargs.get("use_cache", False)
         # Save current selection
         selection = []
         for idx in self.view.selectionModel().selectedIndexes():
@@ -104,12 +131,22 @@ class RundownModule(BaseModule):
             do_update_header = True
             self.start_time = day_start(time.time(), self.playout_config.day_start)
 
+        self.reload_timer.stop()
         self.view.model().load(
             functools.partial(
                 self.load_callback, do_update_header, selection, event, go_to_now
-            )
+            ),
+            use_cache=use_cache,
         )
 
+    def reload(self):
+        """Apply the rundown changes reported by the server.
+
+        Only the days invalidated by the change are loaded again,
+        the other displayed days are served from the cache.
+        """
+        self.load(use_cache=True)
+
     def load_callback(self, do_update_header, selection, event=False, go_to_now=False):
         if do_update_header:
             self.update_header()
@@ -119,25 +156,28 @@ class RundownModule(BaseModule):
             self.view.horizontalHeader().resizeSection(0, 300)
             self.first_load = False
 
-        if event:
-            for i, r in enumerate(self.view.model().object_data):
-                if event.id == r.id and r.object_type == "event":
-                    self.view.scrollTo(
-                        self.view.model().index(i, 0, QModelIndex()),
-                        QAbstractItemView.ScrollHint.PositionAtTop,
-                    )
-                    break
+        model = self.view.model()
+        if event and (row := model.find_row("event", event.id)) is not None:
+            self.view.scrollTo(
+                model.index(row, 0, QModelIndex()),
+                QAbstractItemView.ScrollHint.PositionAtTop,
+            )
+        elif do_update_header and (rows := model.day_rows.get(self.start_time)):
+            # Other days may be displayed as well, show the requested one
+            self.view.scrollTo(
+                model.index(rows[0], 0, QModelIndex()),
+                QAbstractItemView.ScrollHint.PositionAtTop,
+            )
 
         # Restore selection
         if selection:
             item_selection = QItemSelection()
-            for i, row in enumerate(self.view.model().object_data):
-                if [row.object_type, row.id] in selection:
-                    i1 = self.view.model().index(i, 0, QModelIndex())
-                    i2 = self.view.model().index(
-                        i, len(self.view.model().header_data) - 1, QModelIndex()
-                    )
-                    item_selection.select(i1, i2)
+            for object_type, id in selection:
+                if (row := model.find_row(object_type, id)) is None:
+                    continue
+                i1 = model.index(row, 0, QModelIndex())
+                i2 = model.index(row, len(model.header_data) - 1, QModelIndex())
+                item_selection.select(i1, i2)
             self.view.focus_enabled = False
             self.view.selectionModel().select(
                 item_selection,
@@ -146,13 +186,22 @@ class RundownModule(BaseModule):
         self.view.focus_enabled = True
 
         if go_to_now:
-            for i, r in enumerate(self.view.model().object_data):
-                if self.current_item == r.id and r.object_type == "item":
-                    self.view.scrollTo(
-                        self.view.model().index(i, 0, QModelIndex()),
-                        QAbstractItemView.ScrollHint.PositionAtTop,
-                    )
-                    break
+            self.scroll_to_current()
+
+        # Adjacent days are loaded when the view is scrolled to its edges,
+        # or now if the rundown is too short to be scrolled
+        if self.view.rowAt(self.view.viewport().height() - 1) < 0:
+            self.view.on_scroll()
+        self.prefetch_timer.start()
+
+    def prefetch(self):
+        """Load yesterday, today and tomorrow to the rundown cache."""
+        if not self.playout_config:
+            return
+        start = self.playout_config.day_start
+        today = day_start(time.time(), start)
+        days = [today, next_day_start(today, start), prev_day_start(today, start)]
+        self.view.model().prefetch(days)
 
     def update_header(self):
         ch = self.playout_config.name
@@ -177,7 +226,7 @@ class RundownModule(BaseModule):
             self.id_channel = id_channel
 
     def on_channel_changed(self):
-        self.load(do_update_header=True)
+        self.load(do_update_header=True, use_cache=True)
         if self.plugins:
             self.plugins.load()
 
@@ -188,24 +237,34 @@ class RundownModule(BaseModule):
         self.main_window.action_rundown_edit.setEnabled(can_rundown_edit)
         self.toggle_rundown_edit(can_rundown_edit and self.edit_wanted)
 
+    def set_current_day(self, start_time):
+        """Set the day scrolled to when several days are displayed."""
+        if start_time != self.start_time:
+            self.start_time = start_time
+            self.update_header()
+
     def go_day_prev(self):
-        self.load(start_time=self.start_time - (3600 * 24))
+        start = self.playout_config.day_start
+        self.load(start_time=prev_day_start(self.start_time, start), use_cache=True)
 
     def go_day_next(self):
-        self.load(start_time=self.start_time + (3600 * 24))
+        start = self.playout_config.day_start
+        self.load(start_time=next_day_start(self.start_time, start), use_cache=True)
 
     def go_now(self):
         if not (self.start_time + 86400 > time.time() > self.start_time):
             # do not use day_start here. it will be used in the load method
-            self.load(start_time=int(time.time()), go_to_now=True)
+            self.load(start_time=int(time.time()), go_to_now=True, use_cache=True)
         else:
-            for i, r in enumerate(self.view.model().object_data):
-                if self.current_item == r.id and r.object_type == "item":
-                    self.view.scrollTo(
-                        self.view.model().index(i, 0, QModelIndex()),
-                        QAbstractItemView.ScrollHint.PositionAtTop,
-                    )
-                    break
+            self.scroll_to_current()
+
+    def scroll_to_current(self):
+        model = self.view.model()
+        if (row := model.find_row("item", self.current_item)) is not None:
+            self.view.scrollTo(
+                model.index(row, 0, QModelIndex()),
+                QAbstractItemView.ScrollHint.PositionAtTop,
+            )
 
     def show_calendar(self):
         y, m, d = get_date(self)
@@ -213,7 +272,7 @@ class RundownModule(BaseModule):
             return
         hh, mm = self.playout_config.day_start
         dt = datetime.datetime(y, m, d, hh, mm)
-        self.load(start_time=time.mktime(dt.timetuple()))
+        self.load(start_time=time.mktime(dt.timetuple()), use_cache=True)
 
     def toggle_mcr(self):
         if not self.mcr:
@@ -257,41 +316,35 @@ class RundownModule(BaseModule):
 
     def do_find(self, search_string, start_row=-1):
         self.last_search = search_string
-        search_string = search_string.lower()
         if start_row == -1:
             for idx in self.view.selectionModel().selectedIndexes():
                 if idx.row() > start_row:
                     start_row = idx.row()
-        start_row += 1
-        for i, row in enumerate(self.view.model().object_data[start_row:]):
-            for key in ["title", "id/main"]:
-                if str(row[key]).lower().find(search_string) > -1:
-                    selection = QItemSelection()
-                    i1 = self.view.model().index(i + start_row, 0, QModelIndex())
-                    i2 = self.view.model().index(
-                        i + start_row,
-                        len(self.view.model().header_data) - 1,
-                        QModelIndex(),
-                    )
-                    self.view.scrollTo(i1, QAbstractItemView.ScrollHint.PositionAtTop)
-                    selection.select(i1, i2)
-                    self.view.selectionModel().select(
-                        selection,
-                        QItemSelectionModel.SelectionFlag.SelectionFlag.ClearAndSelect,
-                    )
-                    break
-            else:
-                continue
-            break
-        else:
+        model = self.view.model()
+        rows = model.search(search_string)
+        i = bisect.bisect_right(rows, start_row)
+        if i == len(rows):
             log.warning(f"Not found: {self.last_search}")
             self.view.clearSelection()
+            return
+
+        row = rows[i]
+        selection = QItemSelection()
+        i1 = model.index(row, 0, QModelIndex())
+        i2 = model.index(row, len(model.header_data) - 1, QModelIndex())
+        self.view.scrollTo(i1, QAbstractItemView.ScrollHint.PositionAtTop)
+        selection.select(i1, i2)
+        self.view.selectionModel().select(
+            selection,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect,
+        )
 
     #
     # Messaging
     #
 
     def seismic_handler(self, message):
+        self.invalidate_cache(message)
         if self.main_window.current_module != self.main_window.rundown:
             return
 
@@ -318,10 +371,8 @@ class RundownModule(BaseModule):
                 self.cued_item = message.data["cued_item"]
 
                 if self.mcr.isVisible():
-                    for obj in model.object_data:
-                        if obj.object_type == "item" and obj.id == self.cued_item:
-                            self.load()
-                            break
+                    if model.find_row("item", self.cued_item) is not None:
+                        self.load()
                 else:
                     do_refresh = True
 
@@ -338,23 +389,58 @@ class RundownModule(BaseModule):
                         log.debug(
                             f"Event id {id_event} has been changed. Reloading rundown."
                         )
-                        self.load()
+                        self.reload_timer.start()
                         break
             elif message.data["object_type"] == "asset":
                 self.refresh_assets(*message.data["objects"])
 
+        elif message.topic == "rundown_changed":
+            if message.data.get("id_channel", self.id_channel) != self.id_channel:
+                return
+            event_ids = message.data.get("event_ids")
+            model = self.view.model()
+            if event_ids and not any(id in model.event_ids for id in event_ids):
+                return
+            log.debug("Rundown has been changed. Reloading rundown.")
+            self.reload_timer.start()
+
         elif message.topic == "job_progress":
             if self.playout_config.send_action == message.data.get("id_action", -1):
                 model = self.view.model()
-                for row, obj in enumerate(model.object_data):
-                    if obj["id_asset"] == message.data["id_asset"]:
-                        model.object_data[row]["transfer_progress"] = message.data[
-                            "progress"
-                        ]
-                        model.dataChanged.emit(
-                            model.index(row, 0),
-                            model.index(row, len(model.header_data) - 1),
-                        )
+                for row in model.asset_rows(message.data["id_asset"]):
+                    model.object_data[row]["transfer_progress"] = message.data[
+                        "progress"
+                    ]
+                    model.emit_row_changed(row)
+
+    def invalidate_cache(self, message):
+        """Invalidate cached rundown days affected by the message.
+
+        This is done even when the rundown is not displayed,
+        so it is not displayed from outdated data later.
+        """
+        cache = self.view.model().day_cache
+        if message.topic == "objects_changed":
+            object_type = message.data["object_type"]
+            ids = message.data["objects"]
+            if object_type == "event":
+                invalidated = cache.invalidate(event_ids=ids)
+            elif object_type == "bin":
+                invalidated = cache.invalidate(bin_ids=ids)
+            elif object_type == "item":
+                invalidated = cache.invalidate(item_ids=ids)
+            else:
+                return
+        elif message.topic == "rundown_changed":
+            invalidated = cache.invalidate(
+                id_channel=message.data.get("id_channel"),
+                event_ids=message.data.get("event_ids"),
+                moved_events=True,
+            )
+        else:
+            return
+        if invalidated:
+            self.prefetch_timer.start()
 
     def refresh_assets(self, *assets):
         model = self.view.model()
@@ -0,0 +1,139 @@
+"""In-memory cache of rundown days.
+
+Days are cached per channel as received from the server and are
+invalidated by seismic messages about the events, bins and items
+they contain.
+"""
+
+import time
+from collections import OrderedDict
+
+# Number of rundown days kept in memory
+DAY_CACHE_SIZE = 7
+
+# Cached days older than DAY_CACHE_MAX_AGE (seconds) are loaded again,
+# even if no change has been reported (e.g. after a lost connection)
+DAY_CACHE_MAX_AGE = 600
+
+
+def row_value(row, key):
+    if key in row:
+        return row[key]
+    return row.get("meta", {}).get(key)
+
+
+class RundownDay:
+    """Raw rows of a rundown day and the ids of the objects they contain."""
+
+    def __init__(self, rows, fetched_at, valid=True):
+        self.rows = rows
+        self.fetched_at = fetched_at
+        self.valid = valid
+        self.event_ids = set()
+        self.bin_ids = set()
+        self.item_ids = set()
+        for row in rows:
+            if row["type"] == "event":
+                self.event_ids.add(row["id"])
+                self.bin_ids.add(row_value(row, "id_bin"))
+            elif row["type"] == "item":
+                self.item_ids.add(row["id"])
+
+    @property
+    def is_valid(self):
+        return self.valid and time.time() - self.fetched_at < DAY_CACHE_MAX_AGE
+
+
+class RundownDayCache:
+    """LRU cache of rundown days keyed by (id_channel, day start).
+
+    Each day has an epoch, which is incremented when the day is
+    invalidated. A response to a request started in an earlier epoch
+    of the day may predate the change, so it is stored as invalid.
+    Epochs are kept for all requested days, including uncached ones.
+    """
+
+    def __init__(self):
+        self.data: OrderedDict[tuple[int, float], RundownDay] = OrderedDict()
+        self.epochs: dict[tuple[int, float], int] = {}
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def epoch(self, id_channel, day):
+        """Return the current epoch of a day, to be passed to store."""
+        return self.epochs.setdefault((id_channel, day), 0)
+
+    def get(self, id_channel, day):
+        """Return the cached rows of a day (even if invalid) or None."""
+        key = (id_channel, day)
+        if (entry := self.data.get(key)) is None:
+            return None
+        self.data.move_to_end(key)
+        return entry.rows
+
+    def is_valid(self, id_channel, day):
+        entry = self.data.get((id_channel, day))
+        return entry is not None and entry.is_valid
+
+    def store(self, id_channel, day, rows, epoch, keep=()):
+        """Store the rows of a day requested in the given epoch.
+
+        The least recently used days, except those in `keep`,
+        are evicted.
+        """
+        key = (id_channel, day)
+        valid = epoch == self.epoch(id_channel, day)
+        self.data[key] = RundownDay(rows, time.time(), valid=valid)
+        self.data.move_to_end(key)
+        for old_key in list(self.data):
+            if len(self.data) <= DAY_CACHE_SIZE:
+                break
+            if old_key != key and old_key not in keep:
+                del self.data[old_key]
+
+    def invalidate(
+        self,
+        id_channel=None,
+        event_ids=None,
+        bin_ids=None,
+        item_ids=None,
+        moved_events=False,
+    ):
+        """Invalidate the days containing any of the given objects.
+
+        Without ids, all days (of the given channel) are invalidated.
+        With `moved_events`, the events may have been created or moved
+        to another day, so all days (of the given channel) are invalidated
+        when an event is not cached. Returns the keys of the invalidated
+        cached days.
+        """
+        event_ids = set(event_ids or [])
+        bin_ids = set(bin_ids or [])
+        item_ids = set(item_ids or [])
+        everything = not (event_ids or bin_ids or item_ids)
+        if moved_events and not all(
+            any(id in entry.event_ids for entry in self.data.values())
+            for id in event_ids
+        ):
+            everything = True
+
+        invalidated = set()
+        for key in self.epochs:
+            if id_channel is not None and key[0] != id_channel:
+                continue
+            entry = self.data.get(key)
+            if not everything and (
+                entry is None
+                or not (
+                    entry.event_ids & event_ids
+                    or entry.bin_ids & bin_ids
+                    or entry.item_ids & item_ids
+                )
+            ):
+                continue
+            self.epochs[key] += 1
+            if entry is not None and entry.valid:
+                entry.valid = False
+                invalidated.add(key)
+        return invalidated
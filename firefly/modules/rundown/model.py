@@ -1,3 +1,4 @@
+import functools
 import json
 import time
 
@@ -10,7 +11,11 @@ from firefly.api import api
 from firefly.dialogs.rundown import PlaceholderDialog, SubclipSelectDialog
 from firefly.log import log
 from firefly.objects import Asset, Event, Item, asset_cache
-from firefly.view import FireflyViewModel
+from firefly.view import FireflyViewModel, row_ranges
+
+from .cache import RundownDayCache
+from .timing import EVENT, ITEM, OTHER, RundownTiming
+from .utils import next_day_start, prev_day_start
 
 DEFAULT_COLUMNS = [
     "title",
@@ -25,12 +30,88 @@ DEFAULT_COLUMNS = [
     "mark_out",
 ]
 
+# Number of broadcast days displayed at once. When an adjacent day
+# is loaded, the day at the opposite end of the window is dropped.
+MAX_DAYS = 3
+
+
+def day_objects(rows, id_channel, first_row=0):
+    """Create the rundown objects of the rows of a day received from the server.
+
+    The rows are kept intact, so they can stay cached. Returns the objects
+    and the (id_asset, mtime) of the assets the items use.
+    """
+    objects: list[Event | Item] = []
+    assets = []
+    for row in rows:
+        row = dict(row)
+        for key, value in row.pop("meta", {}).items():
+            if key not in row:
+                row[key] = value
+        row["rundown_row"] = first_row + len(objects)
+        row["rundown_scheduled"] = row["scheduled_time"]
+        row["rundown_broadcast"] = row["broadcast_time"]
+        row["rundown_difference"] = row["broadcast_time"] - row["scheduled_time"]
+
+        if row["type"] == "event":
+            row["id_channel"] = id_channel
+            row["start"] = int(row["scheduled_time"] or 0)
+            objects.append(Event.from_trusted(row))
+            if row["is_empty"]:
+                meta = {"title": "(Empty event)", "id_bin": row["id_bin"]}
+                objects.append(Item(meta=meta))
+        elif row["type"] == "item":
+            item = Item.from_trusted(row)
+            item.id_channel = id_channel
+            if row.get("id_asset"):
+                item._asset = asset_cache.get(row["id_asset"])
+                item._asset.meta.pop("mark_in", None)
+                item._asset.meta.pop("mark_out", None)
+                assets.append((row["id_asset"], row["asset_mtime"]))
+            else:
+                item._asset = None
+            objects.append(item)
+    return objects, assets
+
+
+def rundown_timing(object_data):
+    """Return the timing data of the given rundown objects."""
+    timing = RundownTiming()
+    for obj in object_data:
+        if obj.object_type == "event":
+            timing.append(EVENT, obj["run_mode"], obj["start"])
+        elif obj.id:
+            timing.append(ITEM, obj["run_mode"], 0, obj.duration)
+        else:
+            timing.append(OTHER)
+    return timing
+
 
 class RundownModel(FireflyViewModel):
     def __init__(self, *args, **kwargs):
         super(RundownModel, self).__init__(*args, **kwargs)
         self.event_ids = []
-        self.load_start_time = 0
+        self.load_start_time = 0.0
+
+        # Displayed broadcast days (start times, ascending) of the channel
+        # and their rows. Raw rows of recently viewed days are cached.
+        self.channel = None
+        self.days = []
+        self.day_rows = {}
+        self.day_cache = RundownDayCache()
+        self.loading = set()
+        self.prefetching = set()
+        self.generation = 0
+
+        # Row lookup tables, built on first use and dropped
+        # when rows are inserted, removed or moved
+        self._indexes = None
+        self.modelReset.connect(self.clear_indexes)
+        self.layoutChanged.connect(self.clear_indexes)
+        self.rowsInserted.connect(self.clear_indexes)
+        self.rowsRemoved.connect(self.clear_indexes)
+        self.rowsMoved.connect(self.clear_indexes)
+        self.dataChanged.connect(self.check_indexes)
 
     @property
     def id_channel(self):
@@ -48,104 +129,375 @@ class RundownModel(FireflyViewModel):
     def cued_item(self):
         return self.parent().cued_item
 
-    def load(self, callback=None):
+    @property
+    def day_start(self):
+        return self.parent().playout_config.day_start
+
+    #
+    # Loading
+    #
+
+    def window_days(self, day):
+        """Return the days to display so that the given day is displayed.
+
+        The displayed days are kept when the day is one of them
+        or adjacent to them, otherwise only the given day is displayed.
+        """
+        if self.channel != self.id_channel or not self.days:
+            return [day]
+        if day in self.days:
+            return list(self.days)
+        if day == prev_day_start(self.days[0], self.day_start):
+            return [day, *self.days][:MAX_DAYS]
+        if day == next_day_start(self.days[-1], self.day_start):
+            return [*self.days, day][-MAX_DAYS:]
+        return [day]
+
+    def load(self, callback=None, use_cache=False):
+        """(Re)load the displayed days, making the current day displayed.
+
+        With `use_cache`, valid cached days are not requested again,
+        so the rundown is displayed immediately if all of them are cached.
+        """
         self.load_start_time = time.time()
-        self.parent().setCursor(Qt.CursorShape.BusyCursor)
         self.current_callback = callback
-        api.rundown(
-            self.load_callback,
+
+        days = self.window_days(self.start_time)
+        self.generation += 1
+        results = set()
+        if use_cache:
+            results = {d for d in days if self.day_cache.is_valid(self.id_channel, d)}
+        if len(results) == len(days):
+            self.loading = set()
+            self.finish_load(days)
+            return
+
+        self.parent().setCursor(Qt.CursorShape.BusyCursor)
+        self.loading = set(days) - results
+        for day in self.loading:
+            self.request_day(
+                day,
+                functools.partial(
+                    self.load_callback, self.generation, days, results, day
+                ),
+            )
+
+    def reload(self, objects=(), bin_ids=None, callback=None):
+        """Reload the displayed days containing the given objects or bins.
+
+        The other displayed days are served from the cache. Without
+        objects and bins, all displayed days are reloaded.
+        """
+        self.day_cache.invalidate(
             id_channel=self.id_channel,
-            date=format_time(self.start_time, "%Y-%m-%d"),
+            event_ids=[obj.id for obj in objects if obj.object_type == "event"],
+            bin_ids=bin_ids,
+            item_ids=[obj.id for obj in objects if obj.object_type == "item"],
         )
+        self.load(callback, use_cache=True)
 
-    def load_callback(self, response):
-        self.parent().setCursor(Qt.CursorShape.ArrowCursor)
+    def load_callback(self, generation, days, results, day, response):
+        if generation != self.generation:
+            return
         if not response:
+            self.parent().setCursor(Qt.CursorShape.ArrowCursor)
             log.error(response.message)
+            self.generation += 1
+            self.loading = set()
+            return
+        results.add(day)
+        if len(results) < len(days):
             return
+        self.loading = set()
 
         QApplication.processEvents()
+        self.finish_load(days)
+
+    def finish_load(self, days):
         self.parent().setCursor(Qt.CursorShape.WaitCursor)
-        self.beginResetModel()
         log.status("[RUNDOWN] Loading. Please wait...")
+        self.set_days(days)
+        self.parent().setCursor(Qt.CursorShape.ArrowCursor)
+        log.status(f"[RUNDOWN] Loaded in {time.time() - self.load_start_time:.03f}s")
 
-        required_assets = []
+        if self.current_callback:
+            self.current_callback()
 
-        self.header_data = (
-            firefly.settings.get_playout_channel(self.id_channel).rundown_columns
-            or DEFAULT_COLUMNS
+    def load_adjacent(self, forward: bool, visible_rows: range, callback=None):
+        """Add the day before or after the displayed days.
+
+        The day at the opposite end is dropped when more than MAX_DAYS
+        would be displayed, unless it has visible rows. A recently viewed
+        day is displayed immediately and refreshed in the background.
+        """
+        if self.loading or not self.days or self.channel != self.id_channel:
+            return
+        edge = self.days[-1] if forward else self.days[0]
+        if not self.day_rows.get(edge):
+            return  # Do not go past an empty day
+        if forward:
+            day = next_day_start(edge, self.day_start)
+        else:
+            day = prev_day_start(edge, self.day_start)
+
+        for dropped in set(self.days) - set(self.window_days(day)):
+            rows = self.day_rows[dropped]
+            if max(rows.start, visible_rows.start) < min(rows.stop, visible_rows.stop):
+                return
+
+        if (self.channel, day) in self.day_cache:
+            self.set_days(self.window_days(day))
+            if callback:
+                callback()
+            if self.day_cache.is_valid(self.channel, day):
+                return
+            callback = None
+
+        self.loading = {day}
+
+        self.request_day(
+            day,
+            functools.partial(
+                self.load_adjacent_callback, self.generation, day, callback
+            ),
         )
 
-        self.object_data = []
-        self.event_ids = []
+    def load_adjacent_callback(self, generation, day, callback, response):
+        if generation != self.generation:
+            return
+        self.loading = set()
+        if not response:
+            log.error(response.message)
+            return
+        if day in self.days:
+            days = self.days  # Refreshing a day displayed from the cache
+        else:
+            days = self.window_days(day)
+        self.set_days(days)
+        if callback:
+            callback()
+
+    def request_day(self, day, callback):
+        callback = functools.partial(
+            self.request_day_callback,
+            self.id_channel,
+            day,
+            self.day_cache.epoch(self.id_channel, day),
+            callback,
+        )
+        api.rundown(
+            callback,
+            id_channel=self.id_channel,
+            date=format_time(day, "%Y-%m-%d"),
+        )
 
-        i = 0
-        for row in response["rows"]:
-            for key, value in row.get("meta", {}).items():
-                if key not in row:
-                    row[key] = value
-            row.pop("meta", None)
-            row["rundown_row"] = i
-            row["rundown_scheduled"] = row["scheduled_time"]
-            row["rundown_broadcast"] = row["broadcast_time"]
-            row["rundown_difference"] = row["broadcast_time"] - row["scheduled_time"]
-
-            if row["type"] == "event":
-                self.object_data.append(Event(meta=row))
-                self.object_data[-1]["id_channel"] = self.id_channel
-                self.object_data[-1]["start"] = row["scheduled_time"]
-                i += 1
-                self.event_ids.append(row["id"])
-                if row["is_empty"]:
-                    meta = {"title": "(Empty event)", "id_bin": row["id_bin"]}
-                    self.object_data.append(Item(meta=meta))
-                    i += 1
-            elif row["type"] == "item":
-                item = Item(meta=row)
-                item.id_channel = self.id_channel
-                if row.get("id_asset"):
-                    item._asset = asset_cache.get(row["id_asset"])
-                    item._asset.meta.pop("mark_in", None)
-                    item._asset.meta.pop("mark_out", None)
-                    required_assets.append([row["id_asset"], row["asset_mtime"]])
-                else:
-                    item._asset = None
-                self.object_data.append(item)
-                i += 1
-            else:
+    def request_day_callback(self, id_channel, day, epoch, callback, response):
+        if response:
+            displayed = {(self.channel, d) for d in self.days}
+            self.day_cache.store(
+                id_channel, day, response["rows"], epoch, keep=displayed
+            )
+        callback(response)
+
+    def prefetch(self, days):
+        """Request the given days of the current channel in the background.
+
+        Days which are cached and valid or already requested are skipped.
+        """
+        for day in days:
+            key = (self.id_channel, day)
+            if key in self.prefetching or self.day_cache.is_valid(*key):
+                continue
+            if self.channel == self.id_channel and day in self.loading:
                 continue
+            self.prefetching.add(key)
+            self.request_day(day, functools.partial(self.prefetch_callback, key))
+
+    def prefetch_callback(self, key, response):
+        self.prefetching.discard(key)
+
+    def set_days(self, days):
+        """Display the given (cached) days."""
+        header_data = (
+            firefly.settings.get_playout_channel(self.id_channel).rundown_columns
+            or DEFAULT_COLUMNS
+        )
+
+        required_assets = []
+        object_data: list[Event | Item] = []
+        event_ids: list[int] = []
+        day_rows = {}
+
+        for day in days:
+            rows = self.day_cache.get(self.id_channel, day)
+            objects, assets = day_objects(rows, self.id_channel, len(object_data))
+            day_rows[day] = range(len(object_data), len(object_data) + len(objects))
+            object_data.extend(objects)
+            required_assets.extend(assets)
+            event_ids.extend(obj.id for obj in objects if obj.object_type == "event")
 
         asset_cache.request(required_assets)
 
-        self.endResetModel()
-        self.parent().setCursor(Qt.CursorShape.ArrowCursor)
-        log.status(f"[RUNDOWN] Loaded in {time.time() - self.load_start_time:.03f}s")
+        self.days = list(days)
+        self.channel = self.id_channel
+        self.day_rows = day_rows
+        self.event_ids = event_ids
 
-        if self.current_callback:
-            self.current_callback()
+        # Only changed rows are updated, so the selection and scroll
+        # position are kept when the rundown is reloaded after a change
+        self.update_object_data(object_data, header_data)
+
+    def row_day(self, row):
+        """Return the start of the day the given row belongs to."""
+        for day, rows in self.day_rows.items():
+            if row in rows:
+                return day
+        return None
+
+    def row_key(self, obj):
+        if obj.id is None:
+            return ("empty", obj["id_bin"])  # Empty event placeholder
+        return (obj.object_type, obj.id)
+
+    #
+    # Row indexes
+    #
+
+    def _index_values(self, obj):
+        return (self.row_key(obj), obj.meta.get("id_asset"), obj.meta.get("id_bin"))
+
+    @property
+    def indexes(self):
+        """Return (rows by key, rows by asset, row range by bin, indexed values)."""
+        if self._indexes is None:
+            rows = {}
+            asset_rows: dict[int, list[int]] = {}
+            bin_rows: dict[int, tuple[int, int]] = {}
+            values = []
+            for row, obj in enumerate(self.object_data):
+                key, id_asset, id_bin = self._index_values(obj)
+                values.append((key, id_asset, id_bin))
+                rows[key] = row
+                if id_asset:
+                    asset_rows.setdefault(id_asset, []).append(row)
+                if id_bin and obj.object_type == "item":
+                    first = bin_rows.get(id_bin, (row, row))[0]
+                    bin_rows[id_bin] = (first, row)
+            self._indexes = (rows, asset_rows, bin_rows, values)
+        return self._indexes
+
+    def clear_indexes(self, *args):
+        self._indexes = None
+
+    def check_indexes(self, top_left, bottom_right, roles=None):
+        """Drop the indexes if a changed row changed its id, asset or bin."""
+        if self._indexes is None:
+            return
+        values = self._indexes[3]
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            if row >= len(values) or row >= len(self.object_data):
+                self.clear_indexes()
+                return
+            if values[row] != self._index_values(self.object_data[row]):
+                self.clear_indexes()
+                return
+
+    def find_row(self, object_type, id):
+        """Return the row of the given item or event, or None."""
+        return self.indexes[0].get((object_type, id))
+
+    def asset_rows(self, id_asset) -> list[int]:
+        """Return the rows of the items (and events) using the given asset."""
+        return self.indexes[1].get(id_asset, [])
+
+    def bin_rows(self, id_bin) -> range:
+        """Return the rows of the items of the given bin."""
+        if (bounds := self.indexes[2].get(id_bin)) is None:
+            return range(0)
+        return range(bounds[0], bounds[1] + 1)
+
+    def emit_row_changed(self, row):
+        self.dataChanged.emit(
+            self.index(row, 0), self.index(row, len(self.header_data) - 1)
+        )
 
     def refresh_assets(self, assets):
-        for row in range(len(self.object_data)):
-            if (
-                self.object_data[row].object_type == "item"
-                and self.object_data[row]["id_asset"] in assets
-            ):
-                self.object_data[row]._asset = asset_cache.get(
-                    self.object_data[row]["id_asset"]
-                )
-                self.dataChanged.emit(
-                    self.index(row, 0), self.index(row, len(self.header_data) - 1)
-                )
+        for id_asset in assets:
+            for row in self.asset_rows(id_asset):
+                obj = self.object_data[row]
+                if obj.object_type != "item":
+                    continue
+                obj._asset = asset_cache.get(id_asset)
+                self.emit_row_changed(row)
 
     def refresh_items(self, items):
+        for id_item in items:
+            if (row := self.find_row("item", id_item)) is not None:
+                self.emit_row_changed(row)
+
+    #
+    # Timing
+    #
+
+    def recompute_times(self):
+        """Recompute the scheduled and broadcast times of all rows locally.
+
+        Used to preview a change before the rundown is reloaded.
+        The times computed by the server replace them on the next load.
+        """
+        timing = rundown_timing(self.object_data)
+        scheduled, broadcast = timing.compute()
+
+        changed = []
         for row, obj in enumerate(self.object_data):
+            if timing.kinds[row] == OTHER:
+                continue
+            meta = obj.meta
             if (
-                self.object_data[row].id in items
-                and self.object_data[row].object_type == "item"
+                meta.get("rundown_scheduled") == scheduled[row]
+                and meta.get("rundown_broadcast") == broadcast[row]
             ):
-                self.dataChanged.emit(
-                    self.index(row, 0), self.index(row, len(self.header_data) - 1)
-                )
+                continue
+            meta["scheduled_time"] = meta["rundown_scheduled"] = scheduled[row]
+            meta["broadcast_time"] = meta["rundown_broadcast"] = broadcast[row]
+            meta["rundown_difference"] = broadcast[row] - scheduled[row]
+            changed.append(row)
+
+        last_column = len(self.header_data) - 1
+        for first, last in row_ranges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
+    def preview_order(self, id_bin, order):
+        """Display the new order of a bin before the rundown is reloaded.
+
+        Only moves of items already in the rundown are previewed,
+        new items are displayed after the reload.
+        """
+        objects = []
+        for entry in order:
+            if entry["type"] != "item" or not entry["id"]:
+                return
+            if (row := self.find_row("item", entry["id"])) is None:
+                return
+            objects.append(self.object_data[row])
+        if not (rows := self.bin_rows(id_bin)):
+            return
+
+        start, stop = rows.start, rows.stop
+        moved = {self.row_key(obj) for obj in objects}
+        object_data = []
+        for row, obj in enumerate(self.object_data):
+            if row == start:
+                object_data.extend(objects)
+            if start <= row < stop or self.row_key(obj) in moved:
+                continue
+            object_data.append(obj)
+        for obj in objects:
+            obj["id_bin"] = id_bin
+        self.update_object_data(object_data)
+        for row, obj in enumerate(self.object_data):
+            obj.meta["rundown_row"] = row
+        self.recompute_times()
 
     def flags(self, index):
         flags = super(RundownModel, self).flags(index)
@@ -302,20 +654,23 @@ class RundownModel(FireflyViewModel):
 
         if not sorted_items:
             return
+        self.preview_order(to_bin, sorted_items)
         self.parent().setCursor(Qt.CursorShape.BusyCursor)
         QApplication.processEvents()
+        moved = [obj for obj in drop_objects if obj.object_type == "item" and obj.id]
         api.order(
-            self.order_callback,
+            functools.partial(self.order_callback, to_bin, moved),
             id_channel=self.id_channel,
             id_bin=to_bin,
             order=sorted_items,
         )
         return False
 
-    def order_callback(self, response):
+    def order_callback(self, id_bin, moved, response):
         self.parent().setCursor(Qt.CursorShape.ArrowCursor)
         if not response:
             log.error(f"Unable to change bin order: {response.message}")
             return False
-        self.load()
+        # Moved items are also removed from their original bins
+        self.reload(moved, bin_ids=[id_bin])
         return False
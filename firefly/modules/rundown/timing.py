@@ -0,0 +1,83 @@
+"""Client-side computation of rundown times.
+
+Broadcast times are normally computed by the server. This module computes
+them locally, so a change made in the rundown (run mode, order, trimming)
+can be previewed immediately, before the rundown is reloaded.
+
+Rules:
+
+- An event is scheduled at its start time. A hard event starts at its
+  start time, a soft or manual one at its start time or when the previous
+  block ends, whichever is later. Other events follow the previous block.
+  The first event starts at its start time.
+- Items follow each other from the start of their event.
+  Skipped items do not take any time.
+"""
+
+from array import array
+
+from firefly.enum import RunMode
+
+# Row kinds
+EVENT = 0
+ITEM = 1
+OTHER = 2  # Rows without timing (empty event placeholders)
+
+
+class RundownTiming:
+    """Rundown timing data stored column-wise in flat arrays.
+
+    Only the scalars needed for the computation are kept,
+    so a pass over a multi-day rundown does not touch the objects.
+    """
+
+    def __init__(self):
+        self.kinds = array("b")
+        self.run_modes = array("b")
+        self.starts = array("d")
+        self.durations = array("d")
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, kind: int, run_mode: int = 0, start=0, duration=0) -> None:
+        self.kinds.append(kind)
+        self.run_modes.append(int(run_mode or 0))
+        self.starts.append(float(start or 0))
+        self.durations.append(float(duration or 0))
+
+    def compute(self) -> tuple[array, array]:
+        """Return the scheduled and broadcast times of all rows.
+
+        Rows without timing get zeros.
+        """
+        count = len(self.kinds)
+        scheduled = array("d", bytes(8 * count))
+        broadcast = array("d", bytes(8 * count))
+
+        kinds = self.kinds
+        run_modes = self.run_modes
+        starts = self.starts
+        durations = self.durations
+
+        ts_scheduled = ts_broadcast = 0.0
+        started = False
+        for i in range(count):
+            kind = kinds[i]
+            if kind == EVENT:
+                start = starts[i]
+                run_mode = run_modes[i]
+                if not started or run_mode == RunMode.RUN_HARD:
+                    ts_broadcast = start
+                elif run_mode in (RunMode.RUN_SOFT, RunMode.RUN_MANUAL):
+                    ts_broadcast = max(ts_broadcast, start)
+                ts_scheduled = start
+                started = True
+            elif kind != ITEM or not started:
+                continue
+            scheduled[i] = ts_scheduled
+            broadcast[i] = ts_broadcast
+            if kind == ITEM and run_modes[i] != RunMode.RUN_SKIP:
+                ts_scheduled += durations[i]
+                ts_broadcast += durations[i]
+        return scheduled, broadcast
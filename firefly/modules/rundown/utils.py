@@ -80,6 +80,20 @@ def day_start(ts, start):
     return time.mktime(dt.timetuple())
 
 
+def next_day_start(ts, start):
+    """Return the start of the broadcast day following the one containing ts.
+
+    Days are not always 24 hours long (DST), so the middle
+    of the next day is used to find its start.
+    """
+    return day_start(day_start(ts, start) + 36 * 3600, start)
+
+
+def prev_day_start(ts, start):
+    """Return the start of the broadcast day preceding the one containing ts."""
+    return day_start(day_start(ts, start) - 12 * 3600, start)
+
+
 class ItemButton(QToolButton):
     def __init__(self, parent, config):
         super(ItemButton, self).__init__()
@@ -17,6 +17,10 @@ from firefly.view import FireflyView
 
 from .model import RundownModel
 
+# Adjacent days are loaded when the viewport gets within
+# SCROLL_MARGIN rows of the beginning or the end of the rundown
+SCROLL_MARGIN = 20
+
 
 class RundownView(FireflyView):
     def __init__(self, parent):
@@ -28,6 +32,7 @@ class RundownView(FireflyView):
         self.setModel(RundownModel(self))
         self.focus_enabled = True
         self.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.verticalScrollBar().valueChanged.connect(self.on_scroll)
 
     @property
     def id_channel(self):
@@ -49,6 +54,35 @@ class RundownView(FireflyView):
     def cued_item(self):
         return self.parent().cued_item
 
+    def on_scroll(self, value=None):
+        """Track the displayed day and load adjacent days near the edges."""
+        model = self.model()
+        if not model.object_data:
+            return
+        first_row = max(self.rowAt(0), 0)
+        last_row = self.rowAt(self.viewport().height() - 1)
+        if last_row < 0:
+            last_row = len(model.object_data) - 1
+
+        if (day := model.row_day(first_row)) is not None:
+            self.parent().set_current_day(day)
+
+        visible_rows = range(first_row, last_row + 1)
+        if first_row < SCROLL_MARGIN:
+            # Rows are inserted above the viewport, keep the first visible one
+            key = model.row_key(model.object_data[first_row])
+            callback = partial(self.scroll_to_key, key)
+            model.load_adjacent(False, visible_rows, callback)
+        elif last_row >= len(model.object_data) - SCROLL_MARGIN:
+            model.load_adjacent(True, visible_rows, self.on_scroll)
+
+    def scroll_to_key(self, key):
+        model = self.model()
+        if (row := model.find_row(*key)) is not None:
+            self.scrollTo(
+                model.index(row, 0), QAbstractItemView.ScrollHint.PositionAtTop
+            )
+
     def selectionChanged(self, selected, deselected):
         rows = []
         self.selected_objects = []
@@ -74,9 +108,9 @@ class RundownView(FireflyView):
                 asset = self.selected_objects[0].asset
                 times = len(
                     [
-                        obj
-                        for obj in self.model().object_data
-                        if obj.object_type == "item" and obj["id_asset"] == asset.id
+                        row
+                        for row in self.model().asset_rows(asset.id)
+                        if self.model().object_data[row].object_type == "item"
                     ]
                 )
                 log.status(f"[RUNDOWN] {asset} is scheduled {times}x in this rundown")
@@ -284,12 +318,18 @@ class RundownView(FireflyView):
         if not response:
             log.error(response.message)
             return
-        self.model().load()
+        self.model().reload(self.selected_objects)
 
     def on_set_mode(self, mode):
         if not self.parent().can_edit:
             log.error("You are not allowed to modify this rundown")
             return
+        objects = self.selected_objects
+        # Preview the new times until the rundown is reloaded
+        for obj in objects:
+            obj["run_mode"] = mode
+        self.model().recompute_times()
+
         QApplication.processEvents()
         QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
         response = api.ops(
@@ -299,28 +339,40 @@ class RundownView(FireflyView):
                     "id": obj.id,
                     "data": {"run_mode": mode},
                 }
-                for obj in self.selected_objects
+                for obj in objects
             ]
         )
         QApplication.restoreOverrideCursor()
         if not response:
             log.error(response.message)
-            return
-        self.model().load()
+        # Reload even on failure to revert the preview
+        self.model().reload(objects)
 
     def on_trim(self):
         item = self.selected_objects[0]
-        show_trim_dialog(self, item)
-        self.model().load()
+        if (marks := show_trim_dialog(self, item)) is None:
+            return
+        # Preview the new times until the rundown is reloaded
+        for key, value in marks.items():
+            item[key] = value
+        self.model().recompute_times()
+
+        QApplication.processEvents()
+        QApplication.setOverrideCursor(Qt.CursorShape.WaitCursor)
+        response = api.set(object_type="item", id=item.id, data=marks)
+        QApplication.restoreOverrideCursor()
+        if not response:
+            log.error(response.message)
+        # Reload even on failure to revert the preview
+        self.model().reload([item])
 
     def on_split(self):
         item = self.selected_objects[0]
         head_items = []
         tail_items = []
-        for row in self.model().object_data:
-            if row.object_type != "item":
-                continue
-            if row["id_bin"] != item["id_bin"]:
+        for i in self.model().bin_rows(item["id_bin"]):
+            row = self.model().object_data[i]
+            if row.id is None:
                 continue
             if row["rundown_row"] < item["rundown_row"]:
                 head_items.append(row)
@@ -334,7 +386,7 @@ class RundownView(FireflyView):
             tail_items,
             id_channel=self.id_channel,
         )
-        self.model().load()
+        self.model().reload(bin_ids=[item["id_bin"]])
 
     def on_set_primary(self):
         item = self.selected_objects[0]
@@ -350,7 +402,7 @@ class RundownView(FireflyView):
         emeta["id_asset"] = asset.id
 
         api.set(object_type="event", id=item["id_event"], data=emeta)
-        self.model().load()
+        self.model().reload(bin_ids=[item["id_bin"]])
 
     def on_solve(self, solver):
         QApplication.processEvents()
@@ -359,7 +411,7 @@ class RundownView(FireflyView):
         QApplication.restoreOverrideCursor()
         if not response:
             log.error(response.message)
-        self.model().load()
+        self.model().reload(bin_ids=[self.selected_objects[0]["id_bin"]])
         self.parent().main_window.scheduler.load()
 
     def on_delete(self):
@@ -420,8 +472,9 @@ class RundownView(FireflyView):
                 log.error(response.message)
                 return
 
+        deleted = self.selected_objects
         self.selectionModel().clear()
-        self.model().load()
+        self.model().reload(deleted)
         self.parent().main_window.scheduler.refresh_events(events)
 
     def on_send_to(self):
@@ -433,7 +486,7 @@ class RundownView(FireflyView):
             ]
         )
         show_send_to_dialog(self, list(objs))
-        self.model().load()
+        self.model().reload(list(objs))
 
     def on_edit_item(self):
         objs = [
@@ -458,11 +511,12 @@ class RundownView(FireflyView):
         if not response:
             log.error(response.message)
             return
-        self.model().load()
+        self.model().reload([obj])
 
     def on_edit_event(self):
         objs = [obj for obj in self.selected_objects if obj.object_type == "event"]
         if show_event_dialog(self, event=objs[0]):
+            # The event may have been moved to another day
             self.model().load()
         self.parent().main_window.scheduler.load()
 
@@ -61,7 +61,9 @@ class SchedulerModule(BaseModule):
     def open_rundown(self, ts, event=False):
         if not self.main_window.main_widget.rundown:
             return
-        self.main_window.main_widget.rundown.load(start_time=ts, event=event)
+        self.main_window.main_widget.rundown.load(
+            start_time=ts, event=event, use_cache=True
+        )
         self.main_window.main_widget.switch_tab(
             self.main_window.main_widget.rundown, perform_on_switch_tab=False
         )
@@ -1,18 +1,21 @@
-import json
+import functools
 import os
 import time
-
-from PySide6.QtWidgets import QApplication
+from collections import OrderedDict
 
 import firefly
+from firefly import codec
 from firefly.config import config
 from firefly.enum import ContentType, MediaType, ObjectStatus
 from firefly.log import log
 
+from .asset_store import AssetStore
 from .base import BaseObject
 
 
 class Asset(BaseObject):
+    __slots__ = ()
+
     object_type_id = 0
     required = ["media_type", "content_type", "id_folder"]
     defaults = {"media_type": MediaType.VIRTUAL, "content_type": ContentType.TEXT}
@@ -60,108 +63,264 @@ asset_loading = Asset()
 asset_loading["title"] = "Loading..."
 asset_loading["status"] = ObjectStatus.CREATING
 
-CACHE_LIMIT = 1000
+# Maximum number of assets kept in the persistent store
+STORE_LIMIT = 10000
 
 
 class AssetCache:
+    """In-memory LRU cache of assets backed by the persistent store.
+
+    Both the number of assets and their approximate size are limited
+    (see `cache_size` and `cache_memory` in settings.json). The least
+    recently used assets are evicted on insert; they remain available
+    from the store.
+    """
+
     def __init__(self):
-        self.data = {}
+        self.data: OrderedDict[int, Asset] = OrderedDict()
+        self.sizes: dict[int, int] = {}
+        self.total_size = 0
         self.api = None
         self.handler = None
         self.busy = False
+        self.store = None
+        self.accessed = set()
+        self.hits = self.misses = self.evictions = 0
+        self.in_flight: dict[int, float] = {}
+        self.requeue: set[int] = set()
+        self.waiters: dict[int, list] = {}
+        self.missing: set[int] = set()
+        self.not_stored: set[int] = set()
+
+    def __repr__(self):
+        return (
+            f"<AssetCache {len(self.data)} assets ({self.total_size} bytes),"
+            f" hits={self.hits} misses={self.misses} evictions={self.evictions}>"
+        )
+
+    def insert(self, key: int, meta: dict, size: int) -> Asset:
+        """Add an asset to the cache and evict the least recently used ones.
+
+        `size` is the length of the encoded metadata, used as an
+        approximation of its memory footprint.
+        """
+        self.not_stored.discard(key)
+        self.total_size += size - self.sizes.get(key, 0)
+        self.sizes[key] = size
+        self.data[key] = Asset.from_trusted(meta)
+        self.data.move_to_end(key)
+
+        max_size = config.cache_memory * 1024 * 1024
+        while len(self.data) > 1 and (
+            len(self.data) > config.cache_size or self.total_size > max_size
+        ):
+            evicted, _ = self.data.popitem(last=False)
+            self.total_size -= self.sizes.pop(evicted)
+            self.evictions += 1
+        return self.data[key]
+
+    def lookup(self, key: int) -> Asset | None:
+        """Return the cached asset, loading it from the store if needed."""
+        if key in self.data:
+            self.hits += 1
+            self.data.move_to_end(key)
+            return self.data[key]
+        self.misses += 1
+        if self.store is None or key in self.not_stored:
+            return None
+        if (stored := self.store.get(key)) is None:
+            # Do not query the store again on every repaint
+            self.not_stored.add(key)
+            return None
+        self.accessed.add(key)
+        meta, size = stored
+        return self.insert(key, meta, size)
 
     def __getitem__(self, key):
         key = int(key)
-        if key not in self.data:
-            log.debug("Direct loading asset id", key)
-            self.request([[key, 0]])
+        if (asset := self.lookup(key)) is None:
+            if key not in self.missing:
+                log.debug("Direct loading asset id", key)
+                self.request([(key, 0)])
             return Asset()
-        asset = self.data[key]
-        asset["_last_access"] = time.time()
+        self.accessed.add(key)
         return asset
 
-    def get(self, key):
+    def get(self, key, revalidate=False):
+        """Return the cached asset without blocking.
+
+        With `revalidate`, the cached data (if any) is returned
+        immediately and a refresh from the server is scheduled.
+        """
         key = int(key)
-        return self.data.get(key, Asset(meta={"title": "Loading...", "id": key}))
+        if revalidate:
+            self.revalidate([key])
+        if (asset := self.lookup(key)) is None:
+            return Asset(meta={"title": "Loading...", "id": key})
+        return asset
 
-    def request(self, requested: list[tuple[int, int]], handler=None):
-        self.busy = True
+    def fetch(self, key, callback) -> None:
+        """Call `callback` with the asset as soon as it is available.
+
+        Cached assets are passed to the callback immediately, otherwise
+        the asset is requested and the callback is called when it arrives.
+        """
+        key = int(key)
+        if (asset := self.lookup(key)) is not None:
+            callback(asset)
+            return
+        self.waiters.setdefault(key, []).append(callback)
+        self.request([(key, 0)])
+
+    def revalidate(self, ids: list[int]) -> None:
+        """Refresh the given assets from the server in the background.
+
+        Data requested before this call are not considered up to date.
+        """
+        now = time.time()
+        self.request([(id, now) for id in ids])
+
+    def request(self, requested: list[tuple[int, float]], handler=None):
+        """Request assets which are not cached or older than the given mtime.
+
+        mtime 0 forces a refresh. Assets already being requested are not
+        requested again. If an mtime later than the time the request
+        in flight was sent is given, the asset is requested once more
+        after the current response, which might predate the change.
+        """
         to_update = []
         for id, mtime in requested:
             id = int(id)
-            if id not in self.data:
+            self.missing.discard(id)
+            if id in self.in_flight:
+                if mtime and mtime > self.in_flight[id]:
+                    self.requeue.add(id)
+                continue
+            if (asset := self.lookup(id)) is None:
                 to_update.append(id)
             elif not mtime:
                 to_update.append(id)
-            elif self.data[id]["mtime"] < mtime:
+            elif asset["mtime"] < mtime:
                 to_update.append(id)
         if not to_update:
             return True
 
+        now = time.time()
+        for id in to_update:
+            self.in_flight[id] = now
+        self.busy = True
+
         asset_count = len(to_update)
         if asset_count < 10:
             ids = ", ".join([str(k) for k in to_update])
             log.debug(f"Requesting data for asset(s) ID: {ids}")
         else:
             log.debug(f"Requesting data for {asset_count} assets")
-        self.api.get(self.on_response, ids=to_update)
+        self.api.get(functools.partial(self.on_response, to_update), ids=to_update)
+
+    def on_response(self, requested, response):
+        for id in requested:
+            self.in_flight.pop(id, None)
+        self.busy = bool(self.in_flight)
+
+        if requeue := [id for id in requested if id in self.requeue]:
+            self.requeue.difference_update(requeue)
+            self.request([(id, 0) for id in requeue])
 
-    def on_response(self, response):
         if response.is_error:
             log.error(response.message)
-            self.busy = False
+            for id in requested:
+                self.waiters.pop(id, None)
             return False
         ids = []
+        metas = []
+        blobs = []
         for meta in response.data:
             try:
                 id_asset = int(meta["id"])
             except KeyError:
                 continue
-            self.data[id_asset] = Asset(meta=meta)
-            ids.append(id_asset)
-        self.busy = False
-        log.debug(f"Updated {len(ids)} assets in cache")
-        if self.handler:
+            # Only notify views about assets which actually changed
+            old = self.data.get(id_asset)
+            if old is None or old.meta.get("mtime") != meta.get("mtime"):
+                ids.append(id_asset)
+            # Encoded once, for both the size estimate and the store
+            blob = codec.encode(meta)
+            asset = self.insert(id_asset, meta, len(blob))
+            metas.append(meta)
+            blobs.append(blob)
+            for callback in self.waiters.pop(id_asset, []):
+                callback(asset)
+
+        # Do not request assets which do not exist over and over
+        received = {meta["id"] for meta in metas}
+        for id in requested:
+            if id not in received:
+                self.missing.add(id)
+                self.waiters.pop(id, None)
+        if self.store is not None:
+            try:
+                self.store.upsert(metas, blobs)
+            except Exception:
+                log.traceback("Unable to write asset cache")
+        log.debug(f"Updated {len(metas)} assets in cache, {len(ids)} changed")
+        if self.handler and ids:
             self.handler(*ids)
         return True
 
-    def wait(self):
-        while self.busy:
-            time.sleep(0.001)
-            QApplication.processEvents()
-
     @property
     def cache_path(self):
-        return f"ffdata.{config.site.name}.cache"
+        return f"ffdata.{config.site.name}.db"
+
+    @property
+    def legacy_cache_path(self):
+        return os.path.splitext(self.cache_path)[0] + ".cache"
 
     def load(self):
-        if not os.path.exists(self.cache_path):
-            return
-        start_time = time.time()
+        """Open the persistent cache.
+
+        Assets are loaded from the store lazily, on first access.
+        An old JSON cache file is imported into the store once.
+        """
+        self.store = AssetStore(self.cache_path)
         try:
-            data = json.load(open(self.cache_path))
+            self.store.conn
         except Exception:
-            log.traceback(f"Corrupted cache file '{self.cache_path}'")
+            log.traceback(f"Unable to open asset cache '{self.cache_path}'")
+            self.store = None
             return
 
-        for meta in data:
-            self.data[int(meta["id"])] = Asset(meta=meta)
-        elapsed = time.time() - start_time
-        log.debug(f"Loaded {len(self.data)} assets from cache in {elapsed:.03f}s")
+        if os.path.exists(self.legacy_cache_path):
+            start_time = time.time()
+            try:
+                with open(self.legacy_cache_path, "rb") as f:
+                    data = codec.decode(f.read())
+                for meta in data:
+                    meta.pop("_last_access", None)
+                self.store.upsert(data)
+            except Exception:
+                log.traceback(f"Corrupted cache file '{self.legacy_cache_path}'")
+            else:
+                elapsed = time.time() - start_time
+                log.debug(f"Imported {len(data)} assets to cache in {elapsed:.03f}s")
+            os.remove(self.legacy_cache_path)
+
+        self.store.compact_background(STORE_LIMIT)
 
     def save(self):
-        if len(self.data) > CACHE_LIMIT:
-            to_rm = list(self.data.keys())
-            to_rm.sort(key=lambda x: self.data[x].meta.get("_last_access", 0))
-            for t in to_rm[:-CACHE_LIMIT]:
-                del self.data[t]
-
-        log.info(f"Saving {len(self.data)} assets to local cache")
-        start_time = time.time()
-        data = [asset.meta for asset in self.data.values()]
-        with open(self.cache_path, "w") as f:
-            json.dump(data, f)
-        log.debug(f"Cache updated in {(time.time() - start_time):.03f}s")
+        """Persist access times and close the store.
+
+        Asset data itself is written as it is received.
+        """
+        if self.store is None:
+            return
+        log.info("Saving local asset cache")
+        log.debug(f"Asset cache stats: {self}")
+        try:
+            self.store.touch(list(self.accessed))
+        except Exception:
+            log.traceback("Unable to write asset cache")
+        self.store.close()
 
 
 asset_cache = AssetCache()
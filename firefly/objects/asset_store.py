@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from firefly import codec
+from firefly.log import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    id INTEGER PRIMARY KEY,
+    mtime REAL NOT NULL DEFAULT 0,
+    atime REAL NOT NULL DEFAULT 0,
+    meta BLOB NOT NULL
+)
+"""
+
+
+class AssetStore:
+    """SQLite-backed persistent storage of asset metadata.
+
+    Assets are stored one row per asset, so updates are written
+    as they arrive and nothing needs to be parsed at startup.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self.connect()
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM assets").fetchone()[0]
+
+    def get(self, id_asset: int) -> tuple[dict[str, Any], int] | None:
+        """Return the metadata of an asset and the size of its record."""
+        res = self.conn.execute(
+            "SELECT meta FROM assets WHERE id = ?", (id_asset,)
+        ).fetchone()
+        if res is None:
+            return None
+        try:
+            return codec.decode(res[0]), len(res[0])
+        except Exception:
+            log.warning(f"Corrupted cache record of asset ID:{id_asset}")
+            return None
+
+    def upsert(
+        self, metas: list[dict[str, Any]], blobs: list[bytes] | None = None
+    ) -> None:
+        """Store the given assets. Already encoded metadata may be passed."""
+        now = time.time()
+        if blobs is None:
+            blobs = [codec.encode(meta) for meta in metas]
+        rows = [
+            (meta["id"], meta.get("mtime", 0), now, blob)
+            for meta, blob in zip(metas, blobs)
+            if meta.get("id")
+        ]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO assets (id, mtime, atime, meta)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def touch(self, ids: list[int], atime: float | None = None) -> None:
+        atime = atime or time.time()
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE assets SET atime = ? WHERE id = ?",
+                [(atime, id_asset) for id_asset in ids],
+            )
+
+    def compact(self, limit: int) -> None:
+        """Keep only `limit` most recently used assets and reclaim the space."""
+        start_time = time.time()
+        conn = self.connect()
+        try:
+            with conn:
+                conn.execute(
+                    "DELETE FROM assets WHERE id NOT IN"
+                    " (SELECT id FROM assets ORDER BY atime DESC LIMIT ?)",
+                    (limit,),
+                )
+            conn.execute("VACUUM")
+        except sqlite3.Error:
+            log.traceback("Unable to compact asset cache", handlers=False)
+        finally:
+            conn.close()
+        elapsed = time.time() - start_time
+        log.debug(f"Asset cache compacted in {elapsed:.03f}s", handlers=False)
+
+    def compact_background(self, limit: int) -> None:
+        thread = threading.Thread(target=self.compact, args=(limit,), daemon=True)
+        thread.start()
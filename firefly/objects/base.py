@@ -1,25 +1,36 @@
 import pprint
+import sys
 import time
+from typing import Any
 
 from firefly.enum import Colors, ObjectStatus, RunMode
-from firefly.metadata import MetaTypes
+from firefly.metadata import get_meta_types
 from firefly.metadata.format import format_meta
 from firefly.metadata.normalize import normalize_meta
 
 from .format import STATUS_FG_COLORS, format_helpers
 
+_MISSING = object()
+
 
 class BaseObject:
-    """Base object properties."""
+    """Base object properties.
+
+    Objects use __slots__ to keep the per-instance footprint small,
+    as views hold thousands of them. Metadata keys are interned, and
+    class `defaults` are shared by all instances instead of being
+    copied to each object's meta.
+    """
 
-    required = []
-    defaults = {}
+    __slots__ = ("meta", "text_changed", "meta_changed", "is_new")
+
+    required: list[str] = []
+    defaults: dict[str, Any] = {}
 
     def __init__(self, id=False, **kwargs):
         """Object constructor."""
         self.text_changed = self.meta_changed = False
         self.is_new = True
-        self.meta = {}
         meta = kwargs.get("meta", {})
         if id:
             assert type(id) == int, f"{self.object_type} ID must be integer"
@@ -27,8 +38,7 @@ class BaseObject:
             meta is not None
         ), f"Unable to load {self.object_type}. Meta must not be 'None'"
         assert hasattr(meta, "keys"), "Incorrect meta!"
-        for key in meta:
-            self.meta[key] = meta[key]
+        self.meta = {sys.intern(key): meta[key] for key in meta}
         if "id" in self.meta:
             self.is_new = False
         elif not self.meta:
@@ -39,9 +49,26 @@ class BaseObject:
                 self.new()
                 self.is_new = True
                 self["ctime"] = self["mtime"] = time.time()
-        for key in self.defaults:
-            if key not in self.meta:
-                self.meta[key] = self.defaults[key]
+
+    @classmethod
+    def from_trusted(cls, meta: dict[str, Any]):
+        """Create an object from already normalized metadata.
+
+        Use for data received from the server. The metadata are not
+        validated. Keys are interned as in the constructor, as objects
+        decoded from separate responses would not share them otherwise.
+        """
+        obj = cls.__new__(cls)
+        obj.meta = {sys.intern(key): meta[key] for key in meta}
+        obj.text_changed = obj.meta_changed = False
+        obj.is_new = "id" not in meta
+        return obj
+
+    @classmethod
+    def from_list(cls, metas: list[dict[str, Any]]) -> list:
+        """Create a list of objects from trusted server data."""
+        from_trusted = cls.from_trusted
+        return [from_trusted(meta) for meta in metas]
 
     @property
     def id(self):
@@ -60,7 +87,7 @@ class BaseObject:
         If the object has a folder, use the per-folder metadata overrides.
         This allows things filters and defaults to be overridden per-folder.
         """
-        return MetaTypes(self.id_folder)
+        return get_meta_types(self.id_folder)
 
     @property
     def object_type(self):
@@ -78,14 +105,15 @@ class BaseObject:
 
     def __getitem__(self, key):
         key = key.lower().strip()
+        if (value := self.meta.get(key, _MISSING)) is not _MISSING:
+            return value
         if key == "_duration":
             return self.duration  # noqa
-        if key not in self.meta_types:
-            return self.meta.get(key, None)
-        else:
-            mtype = self.meta_types[key]
-            if mtype:
-                return self.meta.get(key, self.meta_types[key].default)
+        if key in self.defaults:
+            return self.defaults[key]
+        if mtype := self.meta_types[key]:
+            return mtype.default
+        return None
 
     def __setitem__(self, key, value):
         """Set a metadata value
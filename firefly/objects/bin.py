@@ -2,6 +2,8 @@ from .base import BaseObject
 
 
 class Bin(BaseObject):
+    __slots__ = ()
+
     object_type_id = 2
     required = ["bin_type"]
     defaults = {"bin_type": 0}
@@ -2,6 +2,8 @@ from .base import BaseObject
 
 
 class Event(BaseObject):
+    __slots__ = ()
+
     object_type_id = 3
     required = ["start", "id_channel"]
 
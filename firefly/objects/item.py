@@ -3,6 +3,8 @@ from .base import BaseObject
 
 
 class Item(BaseObject):
+    __slots__ = ("id_channel", "_asset")
+
     object_type_id = 1
     required = ["id_bin", "id_asset", "position"]
 
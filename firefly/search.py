@@ -0,0 +1,97 @@
+"""Client-side fulltext search.
+
+Texts are split into unaccented, lowercase word tokens. A query matches
+when every query token is a prefix of some token of the indexed texts.
+"""
+
+import bisect
+import re
+from typing import Any, Iterable
+
+from nxtools import unaccent
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: Any) -> set[str]:
+    return set(TOKEN_RE.findall(unaccent(str(text)).lower()))
+
+
+class SearchIndex:
+    """Inverted index of word tokens.
+
+    Keys (e.g. row numbers) are added and updated one by one,
+    so the index can be kept up to date as the data change.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, set[Any]] = {}
+        self.tokens: dict[Any, set[str]] = {}
+        self._sorted_tokens: list[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def update(self, key: Any, texts: Iterable[Any]) -> None:
+        """Index the texts of the given key, replacing its previous texts."""
+        tokens = set()
+        for text in texts:
+            if text:
+                tokens |= tokenize(text)
+        old_tokens = self.tokens.get(key, set())
+        if tokens == old_tokens:
+            return
+
+        for token in old_tokens - tokens:
+            keys = self.postings[token]
+            keys.discard(key)
+            if not keys:
+                del self.postings[token]
+                self._sorted_tokens = None
+        for token in tokens - old_tokens:
+            if token not in self.postings:
+                self.postings[token] = set()
+                self._sorted_tokens = None
+            self.postings[token].add(key)
+
+        if tokens:
+            self.tokens[key] = tokens
+        else:
+            self.tokens.pop(key, None)
+
+    def remove(self, key: Any) -> None:
+        self.update(key, [])
+
+    def prefixed(self, prefix: str) -> Iterable[str]:
+        """Yield the indexed tokens starting with the given prefix."""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+        tokens = self._sorted_tokens
+        i = bisect.bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            yield tokens[i]
+            i += 1
+
+    def search(self, query: str) -> set[Any]:
+        """Return the keys matching all words of the query."""
+        words = tokenize(query)
+        if not words:
+            return set(self.tokens)
+        result: set[Any] | None = None
+        # Longer words usually match fewer keys
+        for word in sorted(words, key=len, reverse=True):
+            if result is not None and len(result) < 1000:
+                # Cheaper to check the few remaining keys
+                result = {
+                    key
+                    for key in result
+                    if any(token.startswith(word) for token in self.tokens[key])
+                }
+            else:
+                matches: set[Any] = set()
+                for token in self.prefixed(word):
+                    matches |= self.postings[token]
+                result = matches if result is None else result & matches
+            if not result:
+                break
+        return result or set()
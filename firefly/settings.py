@@ -1,18 +1,10 @@
 from typing import Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from firefly.enum import ContentType, MediaType
 
 
-def find_by_id(array: list[Any], id: int) -> Any:
-    for item in array:
-        assert hasattr(item, "id")
-        if item.id == id:
-            return item
-    return None
-
-
 class SettingsModel(BaseModel):
     pass
 
@@ -94,20 +86,42 @@ class Settings(SettingsModel):
     server_url: str | None = Field(None, title="Server URL")
     storages: list[StorageSettings] = Field(default_factory=list)
 
+    # id -> object lookup tables of the list sections.
+    # Built on first use and dropped when the section changes.
+    _indexes: dict[str, dict[int, Any]] = PrivateAttr(default_factory=dict)
+
+    def _get_by_id(self, section: str, id: int) -> Any:
+        try:
+            index = self._indexes[section]
+        except KeyError:
+            index = {item.id: item for item in getattr(self, section)}
+            self._indexes[section] = index
+        return index.get(id)
+
     def get_folder(self, id_folder: int) -> FolderSettings:
-        return find_by_id(self.folders, id_folder)
+        return self._get_by_id("folders", id_folder)
 
     def get_view(self, id_view: int) -> ViewSettings:
-        return find_by_id(self.views, id_view)
+        return self._get_by_id("views", id_view)
 
     def get_playout_channel(self, id_channel: int) -> PlayoutChannelSettings:
-        return find_by_id(self.playout_channels, id_channel)
+        return self._get_by_id("playout_channels", id_channel)
 
     def get_storage(self, id_storage: int) -> StorageSettings:
-        return find_by_id(self.storages, id_storage)
+        return self._get_by_id("storages", id_storage)
+
+    def update(self, data: dict[str, Any]) -> set[str]:
+        """Update the settings and return the names of changed sections.
 
-    def update(self, data: dict[str, Any]) -> None:
+        Unchanged sections keep their objects (and lookup tables).
+        """
         new_settings = Settings(**data)
-        for key in new_settings.dict().keys():
-            if key in self.dict().keys():
-                setattr(self, key, getattr(new_settings, key))
+        changed = set()
+        for key in self.__fields__:
+            value = getattr(new_settings, key)
+            if getattr(self, key) == value:
+                continue
+            setattr(self, key, value)
+            self._indexes.pop(key, None)
+            changed.add(key)
+        return changed
@@ -1,14 +1,20 @@
 import functools
 import pprint
 
-from PySide6.QtCore import QAbstractTableModel, QSortFilterProxyModel, Qt
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
 from PySide6.QtGui import QColor
 from PySide6.QtWidgets import QAbstractItemView, QTableView
 
 import firefly
 from firefly.enum import Colors
-from firefly.metadata import meta_types
+from firefly.metadata import get_generation, get_meta_types, meta_types
+from firefly.metadata.format import compile_formatter
+from firefly.objects.format import format_helpers
 from firefly.qt import fontlib, pixlib
+from firefly.search import SearchIndex
+
+# Keys searched by FireflyViewModel.search
+SEARCH_KEYS = ["title", "id/main"]
 
 
 @functools.lru_cache(maxsize=100)
@@ -25,13 +31,259 @@ def format_description(key):
     return ""
 
 
+@functools.lru_cache(maxsize=256)
+def get_color(value):
+    return QColor(value.value if isinstance(value, Colors) else value)
+
+
+# Roles which are cached by the view model. Tooltips are computed
+# only on hover and depend on the debug mode, so they are not cached.
+CACHED_ROLES = (
+    Qt.ItemDataRole.DisplayRole,
+    Qt.ItemDataRole.ForegroundRole,
+    Qt.ItemDataRole.BackgroundRole,
+    Qt.ItemDataRole.DecorationRole,
+    Qt.ItemDataRole.FontRole,
+)
+
+
+class ColumnFormatter:
+    """Display value formatter of a single view column.
+
+    The cell format helper is resolved once per column and the metadata
+    formatter once per folder, so rendering a cell is a direct call.
+    The formatters are compiled again when the metadata are reloaded.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.helper = format_helpers.get(key)
+        self.formatters = {}
+        self.generation = get_generation()
+
+    def __call__(self, obj, model):
+        if self.helper is not None:
+            value = self.helper.display(obj, model=model)
+            if value is not None:
+                return value
+        if self.generation != get_generation():
+            self.formatters = {}
+            self.generation = get_generation()
+        id_folder = obj.id_folder
+        if (formatter := self.formatters.get(id_folder)) is None:
+            formatter = compile_formatter(get_meta_types(id_folder), self.key)
+            self.formatters[id_folder] = formatter
+        return formatter(obj)
+
+
+def row_ranges(rows):
+    """Yield (first, last) ranges of consecutive rows of a sorted list."""
+    start = None
+    for i, row in enumerate(rows):
+        if start is None:
+            start = row
+        if i + 1 == len(rows) or rows[i + 1] != row + 1:
+            yield start, row
+            start = None
+
+
 class FireflyViewModel(QAbstractTableModel):
     def __init__(self, parent):
         super(FireflyViewModel, self).__init__(parent)
         self.object_data = []
-        self.header_data = []
+        self._header_data = []
+        self.column_formatters = []
         self.changed_objects = []
 
+        # Rendered cell values: {row: {(column, role): value}}
+        # Rows are invalidated when dataChanged is emitted for them,
+        # everything is dropped when the model is reset, rows move
+        # or the metadata are reloaded.
+        self.render_cache = {}
+        self.render_generation = get_generation()
+        self.render_hits = 0
+        self.render_misses = 0
+        self.dataChanged.connect(self.on_data_changed)
+        self.modelReset.connect(self.clear_render_cache)
+        self.layoutChanged.connect(self.clear_render_cache)
+        self.rowsInserted.connect(self.clear_render_cache)
+        self.rowsRemoved.connect(self.clear_render_cache)
+        self.rowsMoved.connect(self.clear_render_cache)
+
+        # Fulltext index of the rows: {row: tokens}. Built on first search,
+        # updated as rows change or are appended, dropped when rows move.
+        self._search_index = None
+        self.modelReset.connect(self.clear_search_index)
+        self.layoutChanged.connect(self.clear_search_index)
+        self.rowsMoved.connect(self.clear_search_index)
+        self.rowsInserted.connect(self.on_rows_inserted)
+        self.rowsRemoved.connect(self.on_rows_removed)
+
+    @property
+    def header_data(self):
+        return self._header_data
+
+    @header_data.setter
+    def header_data(self, value):
+        self._header_data = value
+        self.column_formatters = [ColumnFormatter(key) for key in value]
+        self.clear_render_cache()
+
+    @property
+    def render_hit_rate(self):
+        total = self.render_hits + self.render_misses
+        return self.render_hits / total if total else 0
+
+    def clear_render_cache(self, *args):
+        self.render_cache = {}
+        self.render_generation = get_generation()
+
+    def on_data_changed(self, top_left, bottom_right, roles=None):
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self.render_cache.pop(row, None)
+        self.index_rows(top_left.row(), bottom_right.row())
+
+    #
+    # Fulltext search
+    #
+
+    def search_texts(self, obj):
+        """Texts of a row matched by search()."""
+        return [obj[key] for key in SEARCH_KEYS]
+
+    @property
+    def search_index(self) -> SearchIndex:
+        if self._search_index is None:
+            self._search_index = SearchIndex()
+            self.index_rows(0, len(self.object_data) - 1)
+        return self._search_index
+
+    def search(self, query: str) -> list[int]:
+        """Return the sorted rows matching the query."""
+        return sorted(self.search_index.search(query))
+
+    def index_rows(self, first, last):
+        if self._search_index is None:
+            return
+        for row in range(first, min(last, len(self.object_data) - 1) + 1):
+            self._search_index.update(row, self.search_texts(self.object_data[row]))
+
+    def clear_search_index(self, *args):
+        self._search_index = None
+
+    def on_rows_inserted(self, parent, first, last):
+        if last + 1 == len(self.object_data):
+            self.index_rows(first, last)  # Appended, other rows keep their keys
+        else:
+            self.clear_search_index()
+
+    def on_rows_removed(self, parent, first, last):
+        if self._search_index is None:
+            return
+        if first == len(self.object_data):
+            for row in range(first, last + 1):
+                self._search_index.remove(row)
+        else:
+            self.clear_search_index()
+
+    def row_key(self, obj):
+        """Identity of a row used to match rows when updating object data."""
+        return obj.id
+
+    def update_object_data(self, object_data, header_data=None):
+        """Replace the object data emitting only the signals needed.
+
+        Rows are matched by row_key. Removed and inserted rows are
+        signalled as such, a change of order as a layout change with
+        persistent indexes (selection) remapped, and rows whose metadata
+        changed with dataChanged. Rendered values of unchanged rows are
+        kept. The model is reset when the columns change or the keys
+        are not unique.
+        """
+        new_keys = [self.row_key(obj) for obj in object_data]
+        old_keys = [self.row_key(obj) for obj in self.object_data]
+        if (
+            (header_data is not None and header_data != self.header_data)
+            or len(set(new_keys)) != len(new_keys)
+            or len(set(old_keys)) != len(old_keys)
+        ):
+            self.beginResetModel()
+            if header_data is not None:
+                self.header_data = header_data
+            self.object_data = object_data
+            self.endResetModel()
+            return
+
+        parent = QModelIndex()
+        new_rows = {key: row for row, key in enumerate(new_keys)}
+        old_metas = {key: obj.meta for key, obj in zip(old_keys, self.object_data)}
+        old_cache = {
+            old_keys[row]: cache
+            for row, cache in self.render_cache.items()
+            if row < len(old_keys)
+        }
+
+        # Removed rows, bottom-up in contiguous ranges
+        row = len(old_keys) - 1
+        while row >= 0:
+            if old_keys[row] in new_rows:
+                row -= 1
+                continue
+            last = row
+            while row > 0 and old_keys[row - 1] not in new_rows:
+                row -= 1
+            self.beginRemoveRows(parent, row, last)
+            removed = slice(row, last + 1)
+            del self.object_data[removed]
+            del old_keys[removed]
+            self.endRemoveRows()
+            row -= 1
+
+        # Order of the remaining rows
+        remaining = sorted(old_keys, key=new_rows.__getitem__)
+        if remaining != old_keys:
+            self.layoutAboutToBeChanged.emit()
+            positions = {key: row for row, key in enumerate(remaining)}
+            old_indexes = self.persistentIndexList()
+            new_indexes = [
+                self.index(positions[old_keys[index.row()]], index.column())
+                for index in old_indexes
+            ]
+            by_key = dict(zip(old_keys, self.object_data))
+            self.object_data = [by_key[key] for key in remaining]
+            old_keys = remaining
+            self.changePersistentIndexList(old_indexes, new_indexes)
+            self.layoutChanged.emit()
+
+        # Inserted rows, top-down in contiguous ranges
+        row = 0
+        while row < len(new_keys):
+            if new_keys[row] in old_metas:
+                row += 1
+                continue
+            first = row
+            while row + 1 < len(new_keys) and new_keys[row + 1] not in old_metas:
+                row += 1
+            self.beginInsertRows(parent, first, row)
+            inserted = slice(first, row + 1)
+            self.object_data[first:first] = object_data[inserted]
+            self.endInsertRows()
+            row += 1
+
+        # Updated rows
+        self.object_data = object_data
+        self.render_cache = {
+            row: old_cache[key] for row, key in enumerate(new_keys) if key in old_cache
+        }
+        changed = [
+            row
+            for row, obj in enumerate(object_data)
+            if old_metas.get(new_keys[row], obj.meta) != obj.meta
+        ]
+        last_column = self.columnCount(parent) - 1
+        for first, last in row_ranges(changed):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_column))
+
     def rowCount(self, parent):
         return len(self.object_data)
 
@@ -55,24 +307,38 @@ class FireflyViewModel(QAbstractTableModel):
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
+        if role not in CACHED_ROLES:
+            return self.render(index, role)
+
+        if self.render_generation != get_generation():
+            self.clear_render_cache()
+        row = index.row()
+        cell = (index.column(), role)
+        try:
+            value = self.render_cache[row][cell]
+        except KeyError:
+            self.render_misses += 1
+            value = self.render(index, role)
+            self.render_cache.setdefault(row, {})[cell] = value
+        else:
+            self.render_hits += 1
+        return value
+
+    def render(self, index, role):
         row = index.row()
         obj = self.object_data[row]
         key = self.header_data[index.column()]
 
         if role == Qt.ItemDataRole.DisplayRole:
-            return obj.format_display(key, model=self)
+            return self.column_formatters[index.column()](obj, self)
         elif role == Qt.ItemDataRole.ForegroundRole:
             color = obj.format_foreground(key, model=self)
-            return (
-                QColor(color.value if isinstance(color, Colors) else color)
-                if color
-                else None
-            )
+            return get_color(color) if color else None
         elif role == Qt.ItemDataRole.BackgroundRole:
             color = obj.format_background(key, model=self)
             if color is None:
                 return None
-            return QColor(color.value if isinstance(color, Colors) else color)
+            return get_color(color)
         elif role == Qt.ItemDataRole.DecorationRole:
             return pixlib[obj.format_decoration(key, model=self)]
         elif role == Qt.ItemDataRole.FontRole:
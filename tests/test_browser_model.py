@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+pytest.importorskip("PySide6")
+pytest.importorskip("nxtools")
+pytest.importorskip("pydantic")
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication  # noqa: E402
+
+from firefly.api import NebulaResponse  # noqa: E402
+from firefly.modules import browser_model  # noqa: E402
+from firefly.modules.browser_model import BrowserModel  # noqa: E402
+
+QUERY = {"view": 1, "query": "", "order_by": "ctime", "order_dir": "desc"}
+
+
+class SingleShotTimer:
+    """Collects the calls scheduled with QTimer.singleShot."""
+
+    calls: list = []
+
+    @classmethod
+    def singleShot(cls, msec, func):
+        cls.calls.append((msec, func))
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def timer(monkeypatch):
+    SingleShotTimer.calls = []
+    monkeypatch.setattr(browser_model, "QTimer", SingleShotTimer)
+    return SingleShotTimer
+
+
+def test_fetch_callback_success(app, timer):
+    model = BrowserModel(None)
+    model.query = dict(QUERY)
+    model.pending.add(0)
+
+    loaded = []
+    data = [{"id": i, "title": f"Asset {i}", "id_folder": 1} for i in (1, 2, 3)]
+    model.fetch_callback(
+        model.generation,
+        dict(QUERY),
+        0,
+        True,
+        ["title"],
+        lambda: loaded.append(True),
+        NebulaResponse(200, data=data),
+    )
+
+    assert loaded == [True]
+    assert [obj.id for obj in model.object_data] == [1, 2, 3]
+    assert not model.has_more
+    assert not model.pending
+    assert QApplication.overrideCursor() is None
+
+    # Prefetch of the adjacent windows is scheduled with the request query
+    (msec, prefetch), *_ = timer.calls
+    assert msec == browser_model.PREFETCH_DELAY
+    assert prefetch.args == (QUERY, 0)
+    prefetch()
+
+
+def test_refresh_matches_rows_by_id(app, timer):
+    model = BrowserModel(None)
+    model.query = dict(QUERY)
+    data = [{"id": i, "title": f"Asset {i}", "id_folder": 1} for i in (1, 2, 3)]
+    model.fetch_callback(
+        model.generation,
+        dict(QUERY),
+        0,
+        True,
+        ["title"],
+        None,
+        NebulaResponse(200, data=data),
+    )
+
+    inserted = []
+    changed = []
+    model.rowsInserted.connect(
+        lambda parent, first, last: inserted.append((first, last))
+    )
+    model.dataChanged.connect(lambda top, *args: changed.append(top.row()))
+
+    data = [{"id": 4, "title": "Asset 4", "id_folder": 1}, *data]
+    model.refresh_callback(
+        model.generation, dict(QUERY), 500, None, NebulaResponse(200, data=data)
+    )
+
+    assert [obj.id for obj in model.object_data] == [4, 1, 2, 3]
+    assert inserted == [(0, 0)]
+    assert not changed
+    assert list(model.windows) == [0]
@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("PySide6")
+pytest.importorskip("nxtools")
+pytest.importorskip("pydantic")
+
+from firefly.modules.rundown.cache import RundownDayCache  # noqa: E402
+
+DAY = 86400
+
+
+def event_rows(id_event, id_bin, id_item):
+    return [
+        {"type": "event", "id": id_event, "id_bin": id_bin},
+        {"type": "item", "id": id_item, "id_bin": id_bin},
+    ]
+
+
+def test_invalidate_is_scoped_to_the_changed_day():
+    cache = RundownDayCache()
+    for day, id in [(0, 1), (DAY, 2)]:
+        cache.store(1, day, event_rows(id, id, id), cache.epoch(1, day))
+    pending = cache.epoch(1, 2 * DAY)  # Requested, not cached yet
+
+    assert cache.invalidate(item_ids=[2]) == {(1, DAY)}
+    assert cache.is_valid(1, 0)
+    assert not cache.is_valid(1, DAY)
+
+    # Responses to requests of other days are still stored as valid
+    cache.store(1, 2 * DAY, event_rows(3, 3, 3), pending)
+    assert cache.is_valid(1, 2 * DAY)
+
+
+def test_unknown_moved_event_invalidates_the_channel():
+    cache = RundownDayCache()
+    cache.store(1, 0, event_rows(1, 1, 1), cache.epoch(1, 0))
+    cache.store(2, 0, event_rows(2, 2, 2), cache.epoch(2, 0))
+    pending = cache.epoch(1, DAY)
+
+    assert cache.invalidate(event_ids=[9]) == set()
+    assert cache.invalidate(id_channel=1, event_ids=[9], moved_events=True) == {(1, 0)}
+    assert cache.is_valid(2, 0)
+
+    cache.store(1, DAY, event_rows(3, 3, 3), pending)
+    assert not cache.is_valid(1, DAY)